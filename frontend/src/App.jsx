@@ -3,7 +3,8 @@ import './assets/style/stylesheet.css';
 import './assets/style/App.css';
 
 import { BrowserRouter as Router, Routes, Route, useLocation, Navigate } from 'react-router-dom';
-import { useEffect } from 'react';
+import { useEffect, useState } from 'react';
+import axios from 'axios';
 import { checkInitialAuthState, getAuthHeaders, isLoggedIn } from './utils';
 
 import { Header, Searchbar, Booklist, Login, Signin, Welcome, Profile, Settings, Bookpage, GameListPage } from './assets';
@@ -21,6 +22,47 @@ const ProtectedRoute = ({ children }) => {
     return children;
 };
 
+const Home = () => {
+    const [home, setHome] = useState(null);
+    const [homeFailed, setHomeFailed] = useState(false);
+
+    useEffect(() => {
+        // as many recommendations as Booklist shows, three rows of cards
+        const booksPerRow = Math.max(1, Math.floor((window.innerWidth - 40) / (250 + 40)));
+        axios.get('http://127.0.0.1:8000/api/home/', {
+            params: { num: booksPerRow * 3, rated: 3, liked: 3, users: 5 },
+            headers: getAuthHeaders()
+        })
+            .then(response => setHome(response.data))
+            .catch(err => {
+                console.error("Error fetching the homepage:", err);
+                setHomeFailed(true);
+            });
+    }, []);
+
+    // null while loading, undefined lets the sections fetch on their own if the combined request failed
+    const section = (name) => homeFailed ? undefined : home ? home[name] : null;
+
+    return (
+        <>
+            <Searchbar />
+            <div className="home-layout">
+                <div className='right-side-content'>
+                    <TopRatedBooks limit={3} preloaded={section('highest_rated')} />
+                </div>
+                <div className="main-content">
+                    <Booklist preloaded={section('recommended')} />
+                </div>
+                <div className="side-content">
+                    <MostLikedBooks limit={3} preloaded={section('most_liked')} />
+                    <MostActiveUsers limit={5} preloaded={section('most_active_users')} />
+                </div>
+            </div>
+            <Profile />
+        </>
+    );
+};
+
 const App = () => {
     const location = useLocation();
 
@@ -34,24 +76,7 @@ const App = () => {
             <Login />
             <Signin />
             <Routes>
-                <Route path="/" element={
-                    <>
-                        <Searchbar />
-                        <div className="home-layout">
-                            <div className='right-side-content'>
-                                <TopRatedBooks limit={3} />
-                            </div>
-                            <div className="main-content">
-                                <Booklist />
-                            </div>
-                            <div className="side-content">
-                                <MostLikedBooks limit={3} />
-                                <MostActiveUsers limit={5} />
-                            </div>
-                        </div>
-                        <Profile />
-                    </>
-                } />
+                <Route path="/" element={<Home />} />
                 <Route path="/profile/:username" element={
                     <ProtectedRoute>
                         <ProfilePage />
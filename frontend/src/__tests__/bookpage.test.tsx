@@ -78,6 +78,10 @@ const mockReviewsData = [
     { id: 1, username: 'reviewer1', rating: 5, text: 'Amazing read!', created_at: '2024-01-10T10:00:00Z' },
     { id: 2, username: 'reviewer2', rating: 3, text: 'It was okay.', created_at: '2024-01-09T14:30:00Z' },
 ];
+const reviewsPage = (results: typeof mockReviewsData, next: string | null = null) => ({
+    results,
+    pagination: { mode: 'cursor', next, has_next: next !== null },
+});
 const mockIsbnData = '978-3-16-148410-0';
 const mockAuthToken = 'bookpage-token';
 
@@ -133,7 +137,7 @@ describe('Bookpage Component', () => {
         mockedAxios.get.mockImplementation((url: string) => {
             if (url.includes(`/api/book/${mockBookData.id}/`)) return Promise.resolve({ data: mockBookData });
             if (url.includes(`/api/isbn/${mockBookData.key}`)) return Promise.resolve({ data: '1234567890ABC' });
-            if (url.includes(`/api/reviews/${mockBookData.id}/`)) return Promise.resolve({ data: mockReviewsData });
+            if (url.includes(`/api/reviews/${mockBookData.id}/`)) return Promise.resolve({ data: reviewsPage(mockReviewsData) });
             return Promise.reject(new Error(`Unhandled axios GET request in mock: ${url}`));
         });
 
@@ -151,7 +155,7 @@ describe('Bookpage Component', () => {
             mockLocationState.book = null;
             mockedAxios.get.mockImplementation(async (url) => {
                 if (url === bookApiUrl) return new Promise(() => { });
-                return { data: [] };
+                return { data: reviewsPage([]) };
             });
             renderWithRouter(<Bookpage />);
             expect(screen.getByText(/Loading book details.../i)).toBeInTheDocument();
@@ -162,7 +166,7 @@ describe('Bookpage Component', () => {
             const error = new Error('Book not found');
             mockedAxios.get.mockImplementation(async (url) => {
                 if (url === bookApiUrl) throw error;
-                if (url === reviewsApiUrl) return { data: [] };
+                if (url === reviewsApiUrl) return { data: reviewsPage([]) };
                 if (url === isbnApiUrl) return { data: '' };
                 throw new Error(`Unhandled GET: ${url}`);
             });
@@ -178,7 +182,7 @@ describe('Bookpage Component', () => {
             const isbnError = new Error('ISBN lookup failed');
             mockedAxios.get.mockImplementation(async (url) => {
                 if (url === bookApiUrl) return { data: { ...mockBookData } };
-                if (url === reviewsApiUrl) return { data: [...mockReviewsData] };
+                if (url === reviewsApiUrl) return { data: reviewsPage([...mockReviewsData]) };
                 if (url === isbnApiUrl) throw isbnError;
                 throw new Error(`Unhandled GET: ${url}`);
             });
@@ -190,6 +194,29 @@ describe('Bookpage Component', () => {
             expect(await screen.findByText(/ISBN not available/i)).toBeInTheDocument();
             expect(screen.queryByRole('link', { name: /view on national library/i })).not.toBeInTheDocument();
         });
+
+        it('loads reviews a page at a time', async () => {
+            const olderReview = { id: 3, username: 'reviewer3', rating: 4, text: 'Older thoughts.', created_at: '2024-01-01T09:00:00Z' };
+            mockedAxios.get.mockImplementation(async (url, config) => {
+                if (url === bookApiUrl) return { data: { ...mockBookData } };
+                if (url === isbnApiUrl) return { data: mockIsbnData };
+                if (url === reviewsApiUrl && config?.params?.cursor === 'page2') return { data: reviewsPage([olderReview]) };
+                if (url === reviewsApiUrl) return { data: reviewsPage(mockReviewsData, 'page2') };
+                throw new Error(`Unhandled GET: ${url}`);
+            });
+
+            renderWithRouter(<Bookpage />);
+
+            expect(await screen.findByText(mockReviewsData[1].text)).toBeInTheDocument();
+            expect(mockedAxios.get).toHaveBeenCalledWith(reviewsApiUrl, { params: { paginate: 'cursor' } });
+
+            fireEvent.click(await screen.findByRole('button', { name: /Show more reviews/i }));
+
+            expect(await screen.findByText(olderReview.text)).toBeInTheDocument();
+            expect(screen.getByText(mockReviewsData[0].text)).toBeInTheDocument();
+            expect(mockedAxios.get).toHaveBeenCalledWith(reviewsApiUrl, { params: { cursor: 'page2' } });
+            await waitFor(() => expect(screen.queryByRole('button', { name: /Show more reviews/i })).not.toBeInTheDocument());
+        });
     });
 
     describe('Description Toggle', () => {
@@ -311,7 +338,7 @@ describe('Bookpage Component', () => {
             mockedAxios.get.mockImplementation((url) => {
                 if (url.includes(`/api/book/${mockBookData.id}/`)) return Promise.resolve({ data: mockBookData });
                 if (url.includes(`/api/isbn/${mockBookData.key}`)) return Promise.reject(new Error('ISBN fetch failed'));
-                return Promise.resolve({ data: [] });
+                return Promise.resolve({ data: reviewsPage([]) });
             });
             renderWithRouter(<Bookpage />);
             expect(await screen.findByText(/ISBN not available/i)).toBeInTheDocument();
@@ -321,7 +348,7 @@ describe('Bookpage Component', () => {
             mockedAxios.get.mockImplementation((url) => {
                 if (url.includes(`/api/book/${mockBookData.id}/`)) return Promise.resolve({ data: mockBookData });
                 if (url.includes(`/api/isbn/${mockBookData.key}`)) return Promise.reject(new Error('Invalid ISBN fetch'));
-                return Promise.resolve({ data: [] });
+                return Promise.resolve({ data: reviewsPage([]) });
             });
 
             renderWithRouter(<Bookpage />);
@@ -338,7 +365,7 @@ describe('Bookpage Component', () => {
                 return Promise.resolve({ data: '1234567890ABC' });
             }
             if (url.includes(`/api/reviews/${bookData.id}/`)) {
-                return Promise.resolve({ data: [] });
+                return Promise.resolve({ data: reviewsPage([]) });
             }
             return Promise.reject(new Error(`Unhandled axios GET request in mock: ${url}`));
         });
@@ -391,7 +418,7 @@ describe('Bookpage Component - Remaining Coverage', () => {
             mockedAxios.get.mockImplementation((url) => {
                 if (url.includes(`/api/book/${mockBookData.id}/`)) return Promise.resolve({ data: mockBookData });
                 if (url.includes(`/api/isbn/${mockBookData.key}`)) return Promise.reject(isbnError);
-                return Promise.resolve({ data: [] });
+                return Promise.resolve({ data: reviewsPage([]) });
             });
 
             renderWithRouter(<Bookpage />);
@@ -411,7 +438,7 @@ describe('Bookpage Component - Remaining Coverage', () => {
                     return Promise.resolve({ data: mockLocationState.book });
                 }
                 if (url.includes(`/api/reviews/${mockParams.id}/`)) {
-                    return Promise.resolve({ data: mockReviewsData });
+                    return Promise.resolve({ data: reviewsPage(mockReviewsData) });
                 }
                 if (url.includes(`/api/isbn/${mockBookData.key}`)) {
                     return Promise.resolve({ data: mockIsbnData });
@@ -440,7 +467,7 @@ describe('Bookpage Component - Remaining Coverage', () => {
                     return Promise.resolve({ data: mockBookData });
                 }
                 if (url.includes(`/api/reviews/${mockParams.id}/`)) {
-                    return Promise.resolve({ data: mockReviewsData });
+                    return Promise.resolve({ data: reviewsPage(mockReviewsData) });
                 }
                 if (url.includes(`/api/isbn/`)) {
                     return Promise.resolve({ data: mockIsbnData });
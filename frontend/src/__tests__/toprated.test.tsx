@@ -108,4 +108,16 @@ describe('TopRatedBooks Component', () => {
         expect(consoleErrorSpy).toHaveBeenCalledWith("Error fetching top rated books:", mockError);
         expect(MockBookcardFn).not.toHaveBeenCalled();
     });
-});
\ No newline at end of file
+
+    it('shows preloaded books from the homepage request without fetching', async () => {
+        const { rerender } = render(<TopRatedBooks limit={3} preloaded={null} />);
+        expect(screen.getByText(/Loading top books.../i)).toBeInTheDocument();
+
+        rerender(<TopRatedBooks limit={3} preloaded={mockTopBooks} />);
+        expect(await screen.findByText(/Mock Bookcard: Top Book One/i)).toBeInTheDocument();
+        expect(MockBookcardFn).toHaveBeenCalledWith(
+            expect.objectContaining({ book: mockTopBooks[2], isSmall: true }), {}
+        );
+        expect(mockedAxios.get).not.toHaveBeenCalled();
+    });
+});
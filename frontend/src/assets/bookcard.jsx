@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import './style/bookcard.css';
 import saveIcon from './pictures/diskette.png';
 import savedIcon from './pictures/diskette_saved.png';
@@ -9,13 +9,20 @@ import heart from './pictures/hearted.png';
 import { useNavigate } from "react-router-dom";
 import axios from 'axios';
 
-const Bookcard = ({ book, isSmall = false }) => {
+const Bookcard = ({ book, isSmall = false, membership = null }) => {
     const navigate = useNavigate();
     const [isSaved, setIsSaved] = useState(false);
     const [saveStatus, setSaveStatus] = useState(null);
     const [isLiked, setIsLiked] = useState(false);
     const [likeStatus, setLikeStatus] = useState(null);
 
+    useEffect(() => {
+        if (membership) {
+            setIsSaved(membership.saved);
+            setIsLiked(membership.liked);
+        }
+    }, [membership]);
+
     const handleClick = () => {
         console.log("got book", book);
         navigate(`/books/${book.id}`, {state: { book }});
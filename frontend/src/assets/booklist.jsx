@@ -8,7 +8,8 @@ const Booklist = ({
     title = "Recommended Books",
     apiUrl = 'http://127.0.0.1:8000/api/random-book/',
     params = {},
-    booksToShow = 5
+    booksToShow = 5,
+    preloaded
 }) => {
     const [books, setBooks] = useState([]);
     const [loading, setLoading] = useState(true);
@@ -32,6 +33,12 @@ const Booklist = ({
     }, []);
 
     useEffect(() => {
+        if (preloaded !== undefined) {
+            // the homepage loads every section in one request, null while it is on its way
+            setBooks(preloaded || []);
+            setLoading(preloaded === null);
+            return;
+        }
         const fetchBooks = async () => {
             setLoading(true);
             try {
@@ -74,7 +81,7 @@ const Booklist = ({
             }
         };
         fetchBooks();
-    }, [apiUrl, JSON.stringify(params), screenWidth, title]);
+    }, [apiUrl, JSON.stringify(params), screenWidth, title, preloaded]);
 
     return (
         <section className="booklist-container">
@@ -15,6 +15,7 @@ const Bookpage = () => {
     const [reviews, setReviews] = useState([]);
     const [loading, setLoading] = useState(!stateBook);
     const [reviewsLoading, setReviewsLoading] = useState(true);
+    const [nextReviewsCursor, setNextReviewsCursor] = useState(null);
     const [error, setError] = useState(null);
     const [userReview, setUserReview] = useState('');
     const [userRating, setUserRating] = useState(0);
@@ -64,14 +65,17 @@ const Bookpage = () => {
         fetchReviews();
     }, [id]);
 
-    const fetchReviews = async () => {
+    const fetchReviews = async (cursor = null) => {
         if (!id) return;
         setReviewsLoading(true);
         try {
             console.log(`Fetching reviews for book ID: ${id}`);
-            const response = await axios.get(`http://127.0.0.1:8000/api/reviews/${id}/`);
+            const params = cursor ? { cursor } : { paginate: 'cursor' };
+            const response = await axios.get(`http://127.0.0.1:8000/api/reviews/${id}/`, { params });
             console.log("Reviews received:", response.data);
-            setReviews(response.data);
+            const page = response.data.results;
+            setReviews(previous => cursor ? [...previous, ...page] : page);
+            setNextReviewsCursor(response.data.pagination.next);
         } catch (err) {
             console.error("Error fetching reviews:", err);
         } finally {
@@ -243,7 +247,7 @@ const Bookpage = () => {
             <div className="bookpage-reviews">
                 <h3>Reviews</h3>
 
-                {reviewsLoading ? (
+                {reviewsLoading && reviews.length === 0 ? (
                     <div className="loading-reviews">Loading reviews...</div>
                 ) : reviews.length > 0 ? (
                     reviews.map((review, index) => (
@@ -268,6 +272,15 @@ const Bookpage = () => {
                 ) : (
                     <p>No reviews yet. Be the first to review this book!</p>
                 )}
+                {nextReviewsCursor && (
+                    <button
+                        className="bookpage-review-submit"
+                        onClick={() => fetchReviews(nextReviewsCursor)}
+                        disabled={reviewsLoading}
+                    >
+                        {reviewsLoading ? 'Loading...' : 'Show more reviews'}
+                    </button>
+                )}
             </div>
         </div>
     );
@@ -4,12 +4,18 @@ import { Link } from 'react-router-dom';
 import './style/sidebar-widget.css';
 import defaultAvatar from './pictures/user.png';
 
-const MostActiveUsers = ({ limit = 5 }) => {
+const MostActiveUsers = ({ limit = 5, preloaded }) => {
     const [users, setUsers] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
 
     useEffect(() => {
+        if (preloaded !== undefined) {
+            // the homepage loads every section in one request, null while it is on its way
+            setUsers(preloaded || []);
+            setLoading(preloaded === null);
+            return;
+        }
         const fetchMostActiveUsers = async () => {
             try {
                 setLoading(true);
@@ -26,7 +32,7 @@ const MostActiveUsers = ({ limit = 5 }) => {
             }
         };
         fetchMostActiveUsers();
-    }, [limit]);
+    }, [limit, preloaded]);
 
     const formatDate = (dateString) => {
         const date = new Date(dateString);
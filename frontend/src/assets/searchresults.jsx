@@ -19,6 +19,7 @@ const SearchResults = () => {
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
     const [filter, setFilter] = useState(initialFilter);
+    const [membership, setMembership] = useState({});
 
     useEffect(() => {
         console.log("Initial filter:", initialFilter);
@@ -72,6 +73,20 @@ const SearchResults = () => {
         fetchBooks();
     }, [filter, currentPage, resultsPerPage, isSearchQuery]);
 
+    useEffect(() => {
+        const authToken = localStorage.getItem('authToken');
+        if (!authToken || books.length === 0) {
+            setMembership({});
+            return;
+        }
+        axios.get('http://127.0.0.1:8000/api/book-list/membership/', {
+            params: { ids: books.map((book) => book.id).join(',') },
+            headers: { 'Authorization': `Token ${authToken}` }
+        })
+        .then(response => setMembership(response.data))
+        .catch(err => console.error('Error fetching saved/liked state:', err));
+    }, [books]);
+
     const handleResultsPerPageChange = (event) => {
         setResultsPerPage(Number(event.target.value));
         setCurrentPage(1);
@@ -107,7 +122,7 @@ const SearchResults = () => {
             ) : (
                 <div className="book-list">
                     {books.map((book) => (
-                        <Bookcard key={book.id} book={book} />
+                        <Bookcard key={book.id} book={book} membership={membership[book.id]} />
                     ))}
                 </div>
             )}
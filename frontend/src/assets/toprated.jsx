@@ -3,12 +3,18 @@ import axios from 'axios';
 import Bookcard from './bookcard';
 import './style/toprated.css';
 
-const TopRatedBooks = ({ limit = 5 }) => {
+const TopRatedBooks = ({ limit = 5, preloaded }) => {
     const [books, setBooks] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
 
     useEffect(() => {
+        if (preloaded !== undefined) {
+            // the homepage loads every section in one request, null while it is on its way
+            setBooks(preloaded || []);
+            setLoading(preloaded === null);
+            return;
+        }
         const fetchTopRatedBooks = async () => {
             try {
                 setLoading(true);
@@ -27,7 +33,7 @@ const TopRatedBooks = ({ limit = 5 }) => {
         };
 
         fetchTopRatedBooks();
-    }, [limit]);
+    }, [limit, preloaded]);
 
     return (
         <div className="top-rated-container">
@@ -0,0 +1,56 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
+from .models import Books, Review, UserActivity, UserInfo
+
+
+def record_activity(review):
+    '''count a new review and make it the user's latest activity, in a single UPDATE'''
+    if review.user_id is None:
+        return
+
+    latest = {
+        "latest_review_id": review.id,
+        "latest_book_id": review.book_id,
+        "latest_rating": int(review.rating),
+        "latest_review_at": review.created_at,
+    }
+    updated = UserActivity.objects.filter(user_id=review.user_id).update(
+        review_count=F('review_count') + 1, **latest
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            UserActivity.objects.create(user_id=review.user_id, review_count=1, **latest)
+    except IntegrityError:
+        # another request created the row first
+        record_activity(review)
+
+
+def refresh_activity(user_id):
+    '''recount a user from their reviews, used when a review is edited or deleted'''
+    if user_id is None:
+        return
+
+    reviews = Review.objects.filter(user_id=user_id)
+    latest = reviews.order_by('-created_at', '-id').first()
+    if latest is None:
+        UserActivity.objects.filter(user_id=user_id).delete()
+        return
+
+    UserActivity.objects.update_or_create(user_id=user_id, defaults={
+        "review_count": reviews.count(),
+        "latest_review_id": latest.id,
+        "latest_book_id": latest.book_id,
+        "latest_rating": latest.rating,
+        "latest_review_at": latest.created_at,
+    })
+
+
+def most_active(limit):
+    '''users with the most reviews, bio and latest book title included so it is one query'''
+    return UserActivity.objects.filter(review_count__gt=0).select_related('user').annotate(
+        bio=Subquery(UserInfo.objects.filter(user_id=OuterRef('user_id')).values('bio')[:1]),
+        latest_book_title=Subquery(Books.objects.filter(id=OuterRef('latest_book_id')).values('title')[:1]),
+    ).order_by('-review_count', 'user_id')[:limit]
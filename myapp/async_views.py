@@ -0,0 +1,109 @@
+'''
+Async versions of the read-heavy endpoints, under /api/async/. They answer
+exactly like their synchronous twins in views.py and share their cached pages
+and ETags, but only hold a thread while a query runs when served by an ASGI
+server (see the README), so one process can keep many requests in flight.
+'''
+import logging
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+from .authors import resolve_author_name
+from .autocomplete import get_title_index
+from .bookcache import aversioned_payload, book_scope, with_etag
+from .models import Books
+from .pagination import InvalidCursor, wants_cursor_pagination
+from .sampler import book_sampler
+from .views import (
+    MAX_REVIEW_PAGE_SIZE, book_info_data, book_reviews, random_book_count, random_books_data, review_data,
+    review_page_params, reviews_page_payload, search_payload
+)
+
+logger = logging.getLogger(__name__)
+
+
+def json_response(data, status=200):
+    if data is None:
+        # 204 and 304 have no body
+        return HttpResponse(status=status)
+    # DRF's encoder, so dates come out exactly like from the sync views
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+@require_GET
+async def search_books(request):
+    # the search index is queried with raw sql, which the async ORM does not cover
+    data, status = await sync_to_async(search_payload)(request)
+    return json_response(data, status)
+
+
+@require_GET
+async def autocomplete(request):
+    query = request.GET.get('query', '')
+    if not query:
+        return json_response([])
+
+    # only the first call in a process reads the books table
+    index = await sync_to_async(get_title_index)()
+    return json_response([{'id': book_id, 'title': title} for book_id, title in index.complete(query, 5)])
+
+
+@require_GET
+async def retrieve_book_info(request, book_id):
+    data, status, etag = await aversioned_payload(
+        request, book_scope(book_id), 'info', lambda: book_info_payload(book_id)
+    )
+    return with_etag(json_response(data, status), etag)
+
+
+async def book_info_payload(book_id):
+    try:
+        book = await Books.objects.select_related('rating_stats').aget(id=book_id)
+    except Books.DoesNotExist:
+        return {"error": "Book not found"}, 404
+
+    author = await sync_to_async(resolve_author_name)(book.author)
+    return book_info_data(book, author), 200
+
+
+@require_GET
+async def get_reviews(request, bid):
+    try:
+        if not wants_cursor_pagination(request):
+            data, status, etag = await aversioned_payload(
+                request, book_scope(bid), 'reviews', lambda: reviews_payload(bid)
+            )
+            return with_etag(json_response(data, status), etag)
+
+        try:
+            per_page, token, position = review_page_params(request)
+        except InvalidCursor:
+            return json_response({"error": "Invalid cursor"}, 400)
+
+        data, status, etag = await aversioned_payload(
+            request, book_scope(bid), f'reviews-{per_page}-{position}',
+            sync_to_async(lambda: reviews_page_payload(bid, token, per_page))
+        )
+        return with_etag(json_response(data, status), etag)
+
+    except Exception as e:
+        logger.exception("Error getting reviews")
+        return json_response({"error": str(e)}, 500)
+
+
+async def reviews_payload(bid):
+    newest = book_reviews(bid).order_by('-created_at', '-id')[:MAX_REVIEW_PAGE_SIZE]
+    reviews_data = [review_data(review) async for review in newest]
+
+    if not reviews_data:
+        return None, 204
+
+    return reviews_data, 200
+
+
+@require_GET
+async def random_book(request):
+    num_books = random_book_count(request)
+    books_data = random_books_data(await book_sampler.asample_books(num_books))
+    return json_response(books_data[0] if num_books == 1 and books_data else books_data)
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from .models import Author
+
+_MISSING = object()
+
+
+class AuthorNameCache:
+    '''
+    Process-local LRU cache of author key -> name with a TTL.
+    Unknown keys are cached as None so they are not looked up again until they expire.
+    '''
+
+    def __init__(self, max_size=10000, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            name, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return name
+
+    def set(self, key, name):
+        with self._lock:
+            self._entries[key] = (name, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+author_cache = AuthorNameCache(
+    max_size=getattr(settings, 'AUTHOR_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'AUTHOR_CACHE_TTL', 3600),
+)
+
+
+def resolve_author_names(keys):
+    '''
+    Maps author keys to names with at most one key__in query.
+    Keys without an Author row map to themselves, like the views always did.
+    '''
+    names = {}
+    missing = set()
+    for key in set(keys):
+        name = author_cache.get(key)
+        if name is _MISSING:
+            missing.add(key)
+        else:
+            names[key] = name
+
+    if missing:
+        found = dict(Author.objects.filter(key__in=missing).values_list('key', 'name'))
+        for key in missing:
+            names[key] = found.get(key)
+            author_cache.set(key, names[key])
+
+    return {key: name or key for key, name in names.items()}
+
+
+def resolve_author_name(key):
+    return resolve_author_names([key])[key]
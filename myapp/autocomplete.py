@@ -0,0 +1,170 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import close_old_connections, connection
+from .models import Books, BookLikeCount, BookRatingStats, User, UserActivity
+from .prefix_index import InfixIndex, PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+
+class LocalIndex:
+    '''
+    One process's copy of an in-memory index. Signals keep it current for writes
+    made in this process, writes made by the other workers only show up when it is
+    rebuilt, which happens once it is older than the max_age setting: in a background
+    thread while the old copy keeps answering, in place inside a transaction (tests).
+    Changes applied during a rebuild are replayed on the new copy before it is swapped in.
+    '''
+
+    def __init__(self, name, build, max_age_setting, default_max_age, load=None):
+        self.name = name
+        self._build = build
+        # the first copy may come from somewhere cheaper than a full build, e.g. a file
+        self._load = load or build
+        self._max_age_setting = max_age_setting
+        self._default_max_age = default_max_age
+        self._index = None
+        self._built_at = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index, self._built_at = self._load(), time.monotonic()
+            return self._index
+
+        max_age = getattr(settings, self._max_age_setting, self._default_max_age)
+        if time.monotonic() - self._built_at > max_age and self._pending is None:
+            if connection.in_atomic_block:
+                # another connection would not see this transaction's rows
+                self.rebuild()
+            else:
+                self._start_rebuild()
+        return self._index
+
+    def loaded(self):
+        '''the index if this process already has one, signal handlers should not trigger a full load'''
+        return self._index
+
+    def update(self, change):
+        '''apply change(index) to the current copy, and to the one being rebuilt once it is done'''
+        with self._lock:
+            if self._index is not None:
+                change(self._index)
+            if self._pending is not None:
+                self._pending.append(change)
+
+    def rebuild(self):
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+        try:
+            index = self._build()
+        except Exception:
+            logger.exception("Rebuilding the %s index failed, keeping the old one", self.name)
+            with self._lock:
+                self._pending = None
+                # try again after another max_age instead of on every request
+                self._built_at = time.monotonic()
+            return
+        with self._lock:
+            for change in self._pending:
+                change(index)
+            self._index, self._built_at, self._pending = index, time.monotonic(), None
+
+    def _start_rebuild(self):
+        def run():
+            close_old_connections()
+            try:
+                self.rebuild()
+            finally:
+                close_old_connections()
+        threading.Thread(target=run, name=f'{self.name}-index-rebuild', daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self._index, self._built_at, self._pending = None, None, None
+
+
+def book_popularity():
+    '''review count plus like count per book id'''
+    popularity = Counter(dict(BookRatingStats.objects.values_list('book_id', 'review_count')))
+    popularity.update(dict(BookLikeCount.objects.values_list('book_id', 'likes')))
+    return popularity
+
+
+def build_title_index():
+    start_time = time.time()
+    popularity = book_popularity()
+    books = Books.objects.values_list('id', 'title').iterator(chunk_size=10000)
+    index = PrefixIndex((book_id, title, popularity.get(book_id, 0)) for book_id, title in books)
+    logger.info("Built title index with %s books in %.2f seconds", len(index), time.time() - start_time)
+    return index
+
+
+def load_title_index():
+    '''
+    use the prebuilt file from build_title_index when there is one and it still has
+    as many books as the table, else read the books table
+    '''
+    path = getattr(settings, 'TITLE_INDEX_PATH', None)
+    if path and os.path.exists(path):
+        try:
+            index = PrefixIndex.load(path)
+        except Exception as e:
+            logger.warning("Could not load title index from %s: %s", path, e)
+        else:
+            books = Books.objects.count()
+            if len(index) == books:
+                return index
+            logger.warning(
+                "Title index %s has %s books, the table %s, rebuilding it", path, len(index), books
+            )
+    return build_title_index()
+
+
+title_index = LocalIndex('title', build_title_index, 'TITLE_INDEX_REFRESH_SECONDS', 3600, load=load_title_index)
+
+
+def get_title_index():
+    return title_index.get()
+
+
+def update_title_index(change):
+    title_index.update(change)
+
+
+def reset_title_index():
+    title_index.reset()
+
+
+def build_username_index():
+    '''usernames ranked by how many reviews their user wrote'''
+    start_time = time.time()
+    activity = dict(UserActivity.objects.values_list('user_id', 'review_count'))
+    users = User.objects.values_list('id', 'username').iterator(chunk_size=10000)
+    index = InfixIndex((user_id, username, activity.get(user_id, 0)) for user_id, username in users)
+    logger.info("Built username index with %s users in %.2f seconds", len(index), time.time() - start_time)
+    return index
+
+
+username_index = LocalIndex('username', build_username_index, 'USERNAME_INDEX_REFRESH_SECONDS', 300)
+
+
+def get_username_index():
+    return username_index.get()
+
+
+def update_username_index(change):
+    username_index.update(change)
+
+
+def reset_username_index():
+    username_index.reset()
@@ -0,0 +1,127 @@
+import hashlib
+import re
+import uuid
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+from .caching import cache_get, cache_set
+
+CACHEABLE_STATUSES = (200, 204)
+
+
+def _version_key(scope):
+    return f'bookcache_version_{scope}'
+
+
+def book_scope(book_id):
+    return f'book{book_id}'
+
+
+# what OpenLibrary work keys look like (OL45804W), anything else is hashed
+SAFE_WORK_KEY = re.compile(r'[A-Za-z0-9]{1,64}')
+
+
+def work_scope(work_key):
+    '''
+    work_key comes from the url and ends up in cache keys, which memcached limits to
+    250 characters without spaces or control characters. The '-' keeps hashed keys
+    apart from plain ones.
+    '''
+    if SAFE_WORK_KEY.fullmatch(work_key):
+        return f'work{work_key}'
+    return f'work-{hashlib.sha256(work_key.encode()).hexdigest()}'
+
+
+def cache_version(scope):
+    '''
+    Current version of everything cached for a book. A missing version gets a new
+    random one instead of restarting at 1, so entries written before the version
+    was evicted can never be served again.
+    '''
+    version = cache.get(_version_key(scope))
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not cache.add(_version_key(scope), version, None):
+            version = cache.get(_version_key(scope), version)
+    return version
+
+
+def _new_versions(scopes):
+    cache.set_many({_version_key(scope): uuid.uuid4().hex[:12] for scope in scopes}, None)
+
+
+def invalidate(*scopes):
+    '''
+    New versions for scopes, now and again once the transaction commits: the cache
+    is not part of the transaction, a request could cache the old rows in between
+    '''
+    if scopes:
+        _new_versions(scopes)
+        transaction.on_commit(lambda: _new_versions(scopes))
+
+
+def invalidate_book(book_id, work_key=None):
+    invalidate(book_scope(book_id), *([work_scope(work_key)] if work_key else []))
+
+
+def _versioned(request, scope, version, kind):
+    '''(etag, cache key, whether the client already has this version)'''
+    etag = quote_etag(f'{kind}-{scope}-{version}')
+    client_etags = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+    return etag, f'bookcache_{kind}_{scope}_{version}', etag in client_etags or '*' in client_etags
+
+
+def with_etag(response, etag):
+    if etag is not None:
+        response['ETag'] = etag
+        # let clients keep the payload but check back with If-None-Match every time
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def versioned_payload(request, scope, kind, build):
+    '''
+    A per-book payload from the cache, keyed on the scope's version.
+    build() returns (data, status) and only runs on a miss. The version doubles
+    as the ETag, so a matching If-None-Match gets a 304 without touching the database.
+    Returns (data, status, etag), etag is None for statuses that are not cached.
+    '''
+    etag, cache_key, not_modified = _versioned(request, scope, cache_version(scope), kind)
+    if not_modified:
+        return None, 304, etag
+
+    cached = cache_get('book_pages', cache_key)
+    if cached is None:
+        data, status = build()
+        if status not in CACHEABLE_STATUSES:
+            return data, status, None
+        cached = (data, status)
+        cache_set('book_pages', cache_key, cached)
+    data, status = cached
+    return data, status, etag
+
+
+async def aversioned_payload(request, scope, kind, build):
+    '''versioned_payload for the async views, build is a coroutine function'''
+    version = await sync_to_async(cache_version)(scope)
+    etag, cache_key, not_modified = _versioned(request, scope, version, kind)
+    if not_modified:
+        return None, 304, etag
+
+    cached = await sync_to_async(cache_get)('book_pages', cache_key)
+    if cached is None:
+        data, status = await build()
+        if status not in CACHEABLE_STATUSES:
+            return data, status, None
+        cached = (data, status)
+        await sync_to_async(cache_set)('book_pages', cache_key, cached)
+    data, status = cached
+    return data, status, etag
+
+
+def versioned_response(request, scope, kind, build):
+    data, status, etag = versioned_payload(request, scope, kind, build)
+    return with_etag(Response(data, status=status), etag)
@@ -0,0 +1,88 @@
+from .authors import resolve_author_names
+from .models import BookRatingStats, Books, NewTable
+from .search import books_in_order
+
+BOOK_FIELDS = (
+    "id", "key", "title", "description", "author", "author_key", "first_published",
+    "subjects", "cover", "avg_rating", "review_count", "isbn",
+)
+RATING_FIELDS = {"avg_rating", "review_count"}
+
+# Books columns each field needs, so only() can skip long descriptions nobody asked for
+_COLUMNS = {
+    "id": "id",
+    "key": "key",
+    "title": "title",
+    "description": "description",
+    "author": "author",
+    "author_key": "author",
+    "first_published": "first_published",
+    "subjects": "subjects",
+    "cover": "cover",
+    "isbn": "key",
+}
+
+
+def parse_fields(value):
+    '''?fields=id,title,author as a tuple, every field when empty. Raises ValueError on unknown names'''
+    if not value:
+        return BOOK_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in BOOK_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or BOOK_FIELDS
+
+
+def rating_summary(book):
+    '''(average rounded to one decimal, review count) from the select_related rating stats'''
+    try:
+        return round(book.rating_stats.avg_rating, 1), book.rating_stats.review_count
+    except BookRatingStats.DoesNotExist:
+        return None, 0
+
+
+def isbns_for_works(work_keys):
+    '''work key -> first isbn_10 in new_table, one query'''
+    isbns = {}
+    rows = NewTable.objects.filter(works_key__in=set(work_keys)).order_by('id').values_list('works_key', 'isbn_10')
+    for work_key, isbn in rows:
+        isbns.setdefault(work_key, isbn)
+    return isbns
+
+
+def book_details(book_ids, fields=BOOK_FIELDS):
+    '''
+    Book records for many ids in request order, books that do not exist are left out.
+    At most one query each for the books (with rating stats), author names and ISBNs,
+    and only for the fields that were asked for.
+    '''
+    columns = {_COLUMNS[field] for field in fields if field in _COLUMNS}
+    if not RATING_FIELDS.isdisjoint(fields):
+        columns.add('rating_stats')
+    queryset = Books.objects.only('id', *columns)
+    if 'rating_stats' in columns:
+        queryset = queryset.select_related('rating_stats')
+    books = books_in_order(book_ids, queryset)
+
+    authors = resolve_author_names(book.author for book in books) if "author" in fields else {}
+    isbns = isbns_for_works(book.key for book in books) if "isbn" in fields and books else {}
+
+    return [
+        {field: _field_value(book, field, authors, isbns) for field in fields}
+        for book in books
+    ]
+
+
+def _field_value(book, field, authors, isbns):
+    if field == "author":
+        return authors[book.author]
+    if field == "author_key":
+        return book.author
+    if field == "isbn":
+        return isbns.get(book.key)
+    if field == "avg_rating":
+        return rating_summary(book)[0]
+    if field == "review_count":
+        return rating_summary(book)[1]
+    return getattr(book, field)
@@ -0,0 +1,49 @@
+from django.db import IntegrityError, transaction
+from .likes import LIKED_LIST
+from .models import UserBookListEntry
+
+SAVED_LIST = "Saved Books"
+
+
+def list_book_ids(book_list):
+    '''the book ids of a list in the order they were added, as a queryset so it can be paginated'''
+    return book_list.entries.order_by('id').values_list('book_id', flat=True)
+
+
+def add_book_to_list(book_list, book_id):
+    '''True if the book was added, False if it was already on the list'''
+    try:
+        with transaction.atomic():
+            UserBookListEntry.objects.create(book_list=book_list, book_id=book_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def toggle_book(book_list, book_id):
+    '''
+    Removes the book if it is on the list, adds it otherwise.
+    Both ways are a lookup on the (list, book) unique index. Returns True when it was added.
+    '''
+    removed, _ = UserBookListEntry.objects.filter(book_list=book_list, book_id=book_id).delete()
+    if removed:
+        return False
+    add_book_to_list(book_list, book_id)
+    return True
+
+
+def list_membership(user, book_ids):
+    '''
+    {book_id: {"saved": bool, "liked": bool}} for every given id, from one query
+    on the entries of the user's saved and liked lists.
+    '''
+    membership = {book_id: {"saved": False, "liked": False} for book_id in book_ids}
+    entries = UserBookListEntry.objects.filter(
+        book_list__user_id=user,
+        book_list__name__in=[SAVED_LIST, LIKED_LIST],
+        book_id__in=book_ids,
+    ).values_list('book_id', 'book_list__name')
+
+    for book_id, list_name in entries:
+        membership[book_id]["saved" if list_name == SAVED_LIST else "liked"] = True
+    return membership
@@ -0,0 +1,137 @@
+import logging
+from contextlib import contextmanager
+from django.db import connection, transaction
+from .models import Books, DeferredSchemaObject
+from .search import fts_index_available, rebuild_fts_index
+
+logger = logging.getLogger(__name__)
+
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # in WAL mode NORMAL only skips the fsync per commit, a crash can lose the last
+    # batches (they are imported again) but cannot corrupt the database like OFF can
+    'synchronous': 'NORMAL',
+    'cache_size': -262144,  # 256 MB
+    'temp_store': 'MEMORY',
+}
+# sqlite refuses to change these inside a transaction, e.g. when called from a test
+OUTSIDE_TRANSACTION_PRAGMAS = {'journal_mode', 'synchronous', 'temp_store'}
+
+
+def _pragma(cursor, name, value=None):
+    if value is None:
+        cursor.execute(f'PRAGMA {name}')
+    else:
+        cursor.execute(f'PRAGMA {name} = {value}')
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def deferrable_objects(cursor, tables, keep=()):
+    '''
+    (type, name, table, sql) of the triggers and non-unique indexes on tables.
+    Unique indexes stay because the importers upsert on them, and so do indexes
+    whose first column is in keep, a (table, column) set of columns looked up during the load.
+    '''
+    placeholders = ', '.join('%s' for _ in tables)
+    cursor.execute(
+        "SELECT type, name, tbl_name, sql FROM sqlite_master "
+        f"WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({placeholders}) "
+        "ORDER BY type, name",
+        list(tables),
+    )
+    objects = []
+    for object_type, name, table, sql in cursor.fetchall():
+        if object_type == 'index':
+            if sql.upper().startswith('CREATE UNIQUE'):
+                continue
+            cursor.execute(f'PRAGMA index_info("{name}")')
+            columns = [row[2] for row in cursor.fetchall()]
+            if columns and (table, columns[0]) in keep:
+                continue
+        objects.append((object_type, name, table, sql))
+    return objects
+
+
+def restore_deferred_objects():
+    '''
+    Recreates the indexes and triggers recorded by sqlite_bulk_load, at its end or, when
+    its process was killed, on the next import. Returns their names, and rebuilds the
+    search index when its triggers were among them.
+    '''
+    if connection.vendor != 'sqlite':
+        return []
+
+    deferred = list(DeferredSchemaObject.objects.order_by('type', 'name'))
+    if not deferred:
+        return []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for obj in deferred:
+            if obj.name not in existing:
+                cursor.execute(obj.sql)
+        DeferredSchemaObject.objects.filter(name__in=[obj.name for obj in deferred]).delete()
+
+    if any(obj.type == 'trigger' and obj.table == Books._meta.db_table for obj in deferred):
+        # books inserted while the triggers were gone are not in the search index yet
+        if fts_index_available():
+            rebuild_fts_index()
+    names = [obj.name for obj in deferred]
+    logger.info("Recreated %s", ', '.join(names))
+    return names
+
+
+@contextmanager
+def sqlite_bulk_load(models, keep=()):
+    '''
+    Loads into the tables of models at disk speed: WAL with synchronous off and a big
+    page cache while the block runs, secondary indexes and triggers (the search index
+    ones) dropped and rebuilt once at the end, then ANALYZE so the planner sees the new
+    sizes. keep holds (model, column) pairs whose index the import reads from.
+    Everything is put back even when the import fails or is interrupted. The dropped
+    objects are recorded in DeferredSchemaObject in the same transaction as the drop,
+    so after a hard kill the next import puts them back (restore_deferred_objects).
+    Does nothing on other databases.
+    '''
+    if connection.vendor != 'sqlite':
+        logger.warning("Bulk load mode is only implemented for sqlite, importing normally")
+        yield
+        return
+
+    tables = [model._meta.db_table for model in models]
+    keep = {(model._meta.db_table, column) for model, column in keep}
+    # a killed earlier run left its objects dropped, they have to exist to be deferred again
+    restored = restore_deferred_objects()
+    if restored:
+        logger.warning("Restored %s, dropped by a bulk load that did not finish", ', '.join(restored))
+
+    with connection.cursor() as cursor:
+        saved = {name: _pragma(cursor, name) for name in BULK_LOAD_PRAGMAS}
+        for name, value in BULK_LOAD_PRAGMAS.items():
+            if name in OUTSIDE_TRANSACTION_PRAGMAS and connection.in_atomic_block:
+                continue
+            _pragma(cursor, name, value)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        dropped = deferrable_objects(cursor, tables, keep)
+        DeferredSchemaObject.objects.bulk_create([
+            DeferredSchemaObject(type=object_type, name=name, table=table, sql=sql)
+            for object_type, name, table, sql in dropped
+        ])
+        for object_type, name, _, _ in dropped:
+            cursor.execute(f'DROP {object_type.upper()} IF EXISTS "{name}"')
+    logger.info("Bulk load: deferred %s", ', '.join(name for _, name, _, _ in dropped) or "nothing")
+
+    try:
+        yield
+    finally:
+        restore_deferred_objects()
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f'ANALYZE "{table}"')
+            for name, value in saved.items():
+                if name in OUTSIDE_TRANSACTION_PRAGMAS and connection.in_atomic_block:
+                    continue
+                _pragma(cursor, name, value)
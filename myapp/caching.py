@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from .models import CacheCounter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUTS = {
+    'recommended': 300,
+    'result_counts': 300,
+    'book_pages': 3600,
+}
+
+
+def cache_timeout(namespace):
+    '''seconds to keep entries of one kind, from settings.CACHE_TIMEOUTS'''
+    timeouts = getattr(settings, 'CACHE_TIMEOUTS', {})
+    return timeouts.get(namespace, DEFAULT_TIMEOUTS.get(namespace, 300))
+
+
+def cache_namespaces():
+    return sorted(set(DEFAULT_TIMEOUTS) | set(getattr(settings, 'CACHE_TIMEOUTS', {})))
+
+
+def add_to_counter(namespace, kind, count):
+    # an UPDATE ... SET count = count + n, so concurrent flushes from other workers are not lost
+    updated = CacheCounter.objects.filter(namespace=namespace, kind=kind).update(count=F('count') + count)
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            CacheCounter.objects.create(namespace=namespace, kind=kind, count=count)
+    except IntegrityError:
+        # another worker created the row first
+        add_to_counter(namespace, kind, count)
+
+
+class CacheStats:
+    '''
+    Hit/miss counters per namespace. Each process counts in memory and adds its
+    counts to totals kept in the CacheCounter table at most every flush_interval
+    seconds, so the totals cover all workers without a write per request. The
+    writes happen on a background thread, a request never waits for them.
+    '''
+
+    def __init__(self, flush_interval=10):
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._flushed_at = time.monotonic()
+        self._flushing = False
+        self._lock = threading.Lock()
+
+    def record(self, namespace, hit):
+        with self._lock:
+            self._pending[(namespace, 'hits' if hit else 'misses')] += 1
+            due = not self._flushing and time.monotonic() - self._flushed_at >= self.flush_interval
+            if due:
+                self._flushing = True
+        if due:
+            self._start_flush()
+
+    def _start_flush(self):
+        def run():
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+                with self._lock:
+                    self._flushing = False
+        threading.Thread(target=run, name='cache-stats-flush', daemon=True).start()
+
+    def flush(self):
+        '''
+        adds the counts to the shared totals, counts that could not be written
+        (e.g. the database is locked) are kept for the next flush
+        '''
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed_at = time.monotonic()
+        while pending:
+            (namespace, kind), count = next(iter(pending.items()))
+            try:
+                add_to_counter(namespace, kind, count)
+            except DatabaseError:
+                logger.exception("Saving the cache hit/miss counts failed, keeping them for the next flush")
+                with self._lock:
+                    self._pending.update(pending)
+                return
+            del pending[(namespace, kind)]
+
+    def totals(self):
+        '''{namespace: {"hits", "misses", "hit_rate"}} over every process'''
+        self.flush()
+        values = {
+            (namespace, kind): count
+            for namespace, kind, count in CacheCounter.objects.values_list('namespace', 'kind', 'count')
+        }
+
+        totals = {}
+        for namespace in cache_namespaces():
+            hits = values.get((namespace, 'hits'), 0)
+            misses = values.get((namespace, 'misses'), 0)
+            totals[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            }
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+        CacheCounter.objects.all().delete()
+
+
+cache_stats = CacheStats(getattr(settings, 'CACHE_STATS_FLUSH_SECONDS', 10))
+
+
+def cache_get(namespace, key):
+    '''cache.get that counts towards the namespace's hit rate, None is a miss'''
+    value = cache.get(key)
+    cache_stats.record(namespace, value is not None)
+    return value
+
+
+def cache_set(namespace, key, value):
+    cache.set(key, value, cache_timeout(namespace))
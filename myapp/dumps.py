@@ -0,0 +1,371 @@
+import gzip
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.db import transaction
+from .bookcache import book_scope, invalidate, work_scope
+from .models import Author, Books, BookSubject, EditionYear, NewTable
+from .subjects import index_subjects
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def default_workers():
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def open_dump(path):
+    '''
+    OpenLibrary dumps are tab separated lines: type, key, revision, last modified, json.
+    Opened in binary so lines go to the parser processes undecoded, gzip is detected from the file.
+    '''
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    return gzip.open(path, 'rb') if compressed else open(path, 'rb')
+
+
+def read_batches(dump, batch_size, record_type=None):
+    '''
+    (offset, lines) with up to batch_size raw lines, lines of other record types are
+    dropped here already. offset is where the line after the batch starts, the place
+    to seek to when resuming after this batch.
+    '''
+    prefix = record_type.encode() + b'\t' if record_type else None
+    batch = []
+    for line in dump:
+        if prefix and not line.startswith(prefix):
+            continue
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield dump.tell(), batch
+            batch = []
+    if batch:
+        yield dump.tell(), batch
+
+
+def parallel_map(func, batches, workers):
+    '''
+    func over the lines of every (offset, lines) batch in a process pool, yields
+    (offset, result) in input order. Only a few batches are in flight at a time, so
+    a dump of any size streams through in constant memory. workers=1 runs everything
+    in this process.
+    '''
+    if workers <= 1:
+        for offset, batch in batches:
+            yield offset, func(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for offset, batch in batches:
+            pending.append((offset, pool.submit(func, batch)))
+            if len(pending) >= workers * 2:
+                offset, future = pending.popleft()
+                yield offset, future.result()
+        while pending:
+            offset, future = pending.popleft()
+            yield offset, future.result()
+
+
+class Checkpoint:
+    '''
+    Remembers how far into a dump an import got, as a byte offset that is saved after
+    each batch commits, so a restart seeks straight there instead of re-reading the file.
+    A batch that committed just before a crash is replayed, every importer writes
+    batches so that doing one twice changes nothing.
+    '''
+
+    def __init__(self, path, dump_path):
+        self.path = path
+        self.dump_path = os.path.abspath(dump_path)
+        self.dump_size = os.path.getsize(dump_path)
+
+    def load(self):
+        '''(offset, records) to resume from, (0, 0) without a checkpoint or when it is for another dump'''
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0, 0
+        if state.get('dump') != self.dump_path or state.get('size') != self.dump_size:
+            return 0, 0
+        return state.get('offset', 0), state.get('records', 0)
+
+    def save(self, offset, records):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"dump": self.dump_path, "size": self.dump_size, "offset": offset, "records": records}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def run_import(path, parse, record_type, write, batch_size=5000, workers=1, progress=None, checkpoint=None):
+    '''
+    Streams one dump through parse (in the worker processes) and write (here, one
+    batch at a time). With a checkpoint the import starts where the last run stopped
+    and the checkpoint is removed once the whole dump is in.
+    Returns (records read, bad lines).
+    '''
+    offset, total = checkpoint.load() if checkpoint else (0, 0)
+    errors = 0
+    with open_dump(path) as dump:
+        if offset:
+            # plain files seek instantly, gzip ones decompress up to the offset without parsing
+            dump.seek(offset)
+        for offset, (records, bad_lines) in parallel_map(parse, read_batches(dump, batch_size, record_type), workers):
+            write(records)
+            total += len(records)
+            errors += bad_lines
+            if checkpoint:
+                checkpoint.save(offset, total)
+            if progress:
+                progress(total)
+    if checkpoint:
+        checkpoint.clear()
+    return total, errors
+
+
+# what reading a field of an unexpected shape raises, e.g. .get on a list or .strip on a number
+BAD_RECORD_ERRORS = (ValueError, TypeError, AttributeError)
+
+
+def record_json(line):
+    parts = line.rstrip(b'\n').split(b'\t')
+    if len(parts) < 5:
+        raise ValueError("expected 5 tab separated columns")
+    data = json.loads(parts[4])
+    if not isinstance(data, dict):
+        raise ValueError("expected a json object")
+    return data
+
+
+def parse_lines(lines, parse_record):
+    '''
+    runs in the worker processes: raw dump lines -> ([parse_record(json)], number of bad lines).
+    parse_record returns None for records to skip, lines that are not json objects or
+    whose fields have an unexpected shape count as bad instead of failing the import.
+    '''
+    records, errors = [], 0
+    for line in lines:
+        try:
+            record = parse_record(record_json(line))
+        except BAD_RECORD_ERRORS:
+            errors += 1
+            continue
+        if record is not None:
+            records.append(record)
+    return records, errors
+
+
+def strip_key(key, prefix):
+    return (key or '').replace(prefix, '')
+
+
+YEAR = re.compile(r'\b(\d{4})\b')
+
+
+def parse_year(text):
+    match = YEAR.search(text or '')
+    return int(match.group(1)) if match else None
+
+
+def first_cover(covers):
+    '''covers lists can hold -1 for removed images'''
+    return next((cover for cover in covers or [] if isinstance(cover, int) and cover > 0), None)
+
+
+def parse_author(data):
+    key = strip_key(data.get('key'), '/authors/')
+    name = (data.get('name') or '').strip()
+    return (key, name[:255]) if key and name else None
+
+
+def parse_author_lines(lines):
+    '''raw dump lines -> ([(key, name)], number of bad lines)'''
+    return parse_lines(lines, parse_author)
+
+
+def import_authors(path, update=False, **options):
+    '''
+    Streams an author dump into the Author table, one transaction per batch.
+    Existing keys are skipped, or get their name updated with update=True.
+    Returns (authors read, bad lines).
+    '''
+    conflict_options = (
+        {"update_conflicts": True, "unique_fields": ['key'], "update_fields": ['name']}
+        if update else {"ignore_conflicts": True}
+    )
+
+    def write(authors):
+        with transaction.atomic():
+            Author.objects.bulk_create([Author(key=key, name=name) for key, name in authors], **conflict_options)
+
+    return run_import(path, parse_author_lines, '/type/author', write, **options)
+
+
+def text_value(value):
+    '''descriptions are either plain strings or {"type": "/type/text", "value": ...}'''
+    if isinstance(value, dict):
+        value = value.get('value')
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def primary_author_key(authors):
+    for author in authors or []:
+        key = (author.get('author') or {}).get('key') or author.get('key')
+        if key:
+            return strip_key(key, '/authors/')
+    return ''
+
+
+def parse_work(data):
+    key = strip_key(data.get('key'), '/works/')
+    title = (data.get('title') or '').strip()
+    if not key or not title:
+        return None
+    subjects = [str(subject).strip() for subject in data.get('subjects') or [] if str(subject).strip()]
+    return {
+        "key": key,
+        "title": title[:255],
+        "description": text_value(data.get('description')),
+        "subjects": ', '.join(subjects) or None,
+        "author": primary_author_key(data.get('authors'))[:255],
+        "cover": first_cover(data.get('covers')),
+        "first_published": parse_year(data.get('first_publish_date')),
+    }
+
+
+def parse_work_lines(lines):
+    '''raw dump lines -> ([Books field dicts], number of bad lines)'''
+    return parse_lines(lines, parse_work)
+
+
+def parse_edition(data):
+    works = data.get('works') or []
+    work_key = strip_key(works[0].get('key'), '/works/') if works else ''
+    if not work_key:
+        return None
+    isbns = [isbn.replace('-', '').strip() for isbn in data.get('isbn_10') or [] if isinstance(isbn, str)]
+    return (
+        work_key,
+        [isbn[:255] for isbn in isbns if isbn],
+        first_cover(data.get('covers')),
+        parse_year(data.get('publish_date')),
+    )
+
+
+def parse_edition_lines(lines):
+    '''raw dump lines -> ([(work key, isbns, cover, year)], number of bad lines)'''
+    return parse_lines(lines, parse_edition)
+
+
+BOOK_UPDATE_FIELDS = ['title', 'description', 'subjects', 'author', 'cover', 'first_published']
+
+
+def write_works(works, known_subjects):
+    '''
+    Upserts one batch of works on Books.key and re-indexes their subjects. Books that
+    already have a cover or year (e.g. from import_editions) keep them when the work has none.
+    Returns the ids of books that existed before, their cached pages are stale.
+    '''
+    by_key = {work["key"]: work for work in works}
+    works = list(by_key.values())
+    keys = list(by_key)
+    existing = {}
+    for key, book_id, cover, first_published in (
+        Books.objects.filter(key__in=keys).values_list('key', 'id', 'cover', 'first_published')
+    ):
+        existing[key] = book_id
+        by_key[key]["cover"] = by_key[key]["cover"] or cover
+        by_key[key]["first_published"] = by_key[key]["first_published"] or first_published
+
+    with transaction.atomic():
+        Books.objects.bulk_create(
+            [Books(**work) for work in works],
+            update_conflicts=True, unique_fields=['key'], update_fields=BOOK_UPDATE_FIELDS,
+        )
+        ids = dict(Books.objects.filter(key__in=keys).values_list('key', 'id'))
+        # bulk writes skip the signals, so keep the subject index in step here
+        BookSubject.objects.filter(book_id__in=existing.values()).delete()
+        index_subjects([(ids[work["key"]], work["subjects"]) for work in works if work["subjects"]], known_subjects)
+    return list(existing.values())
+
+
+def write_editions(editions):
+    '''
+    Adds the ISBNs of one batch of editions to new_table, pairs that are already
+    there are skipped so the import can be re-run. Books without a cover or year
+    get them from their editions, the year is the earliest edition year over all
+    batches (the dump is not sorted by work). Returns the cache scopes that changed.
+    '''
+    work_keys = {work_key for work_key, _, _, _ in editions}
+    known = set(NewTable.objects.filter(works_key__in=work_keys).values_list('works_key', 'isbn_10'))
+
+    new_rows, covers, years = [], {}, {}
+    for work_key, isbns, cover, year in editions:
+        for isbn in isbns:
+            if (work_key, isbn) not in known:
+                known.add((work_key, isbn))
+                new_rows.append(NewTable(works_key=work_key, isbn_10=isbn))
+        if cover:
+            covers.setdefault(work_key, cover)
+        if year:
+            years[work_key] = min(year, years.get(work_key, year))
+
+    candidates = list(
+        Books.objects.filter(key__in=set(covers) | set(years)).only('id', 'key', 'cover', 'first_published')
+    )
+    edition_years = dict(
+        EditionYear.objects.filter(book_id__in=[book.id for book in candidates]).values_list('book_id', 'year')
+    )
+
+    books, new_years = [], []
+    for book in candidates:
+        cover = book.cover or covers.get(book.key)
+        year = book.first_published
+        # a year an earlier batch took from the editions can still go down, the work's own year stays
+        from_editions = year is None or year == edition_years.get(book.id)
+        if years.get(book.key) and from_editions and (year is None or years[book.key] < year):
+            year = years[book.key]
+            new_years.append(EditionYear(book_id=book.id, year=year))
+        if (cover, year) != (book.cover, book.first_published):
+            book.cover, book.first_published = cover, year
+            books.append(book)
+
+    with transaction.atomic():
+        NewTable.objects.bulk_create(new_rows)
+        Books.objects.bulk_update(books, ['cover', 'first_published'])
+        EditionYear.objects.bulk_create(
+            new_years, update_conflicts=True, unique_fields=['book'], update_fields=['year']
+        )
+
+    changed = {work_scope(row.works_key) for row in new_rows}
+    changed.update(book_scope(book.id) for book in books)
+    return changed
+
+
+def import_works(path, **options):
+    '''
+    Streams a works dump into Books, inserting new works and updating known ones,
+    so it can be re-run on a newer dump. Returns (works read, bad lines).
+    '''
+    known_subjects = {}
+
+    def write(works):
+        updated = write_works(works, known_subjects)
+        invalidate(*(book_scope(book_id) for book_id in updated))
+
+    return run_import(path, parse_work_lines, '/type/work', write, **options)
+
+
+def import_editions(path, **options):
+    '''Streams an editions dump into new_table and fills missing covers and years. Returns (editions read, bad lines)'''
+    def write(editions):
+        invalidate(*write_editions(editions))
+
+    return run_import(path, parse_edition_lines, '/type/edition', write, **options)
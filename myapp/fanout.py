@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'HOME_SECTION_WORKERS', 4), thread_name_prefix='fanout'
+                )
+    return _pool
+
+
+def _in_pool_thread(task):
+    # pool threads keep their own connections, treat every task like a request would
+    close_old_connections()
+    try:
+        return task()
+    finally:
+        close_old_connections()
+
+
+def run_concurrently(tasks):
+    '''
+    Runs a {name: callable} dict and returns {name: result}. The callables run at the
+    same time on a shared pool of HOME_SECTION_WORKERS threads, each with its own
+    database connection, so they should only read. They run one after another in
+    the calling thread when the pool size is 1 or inside a transaction, whose
+    uncommitted rows other connections would not see (e.g. in tests).
+    '''
+    if getattr(settings, 'HOME_SECTION_WORKERS', 4) <= 1 or len(tasks) <= 1 or connection.in_atomic_block:
+        return {name: task() for name, task in tasks.items()}
+
+    futures = {name: _get_pool().submit(_in_pool_thread, task) for name, task in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
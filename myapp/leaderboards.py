@@ -0,0 +1,126 @@
+import json
+import logging
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from .activity import most_active
+from .authors import resolve_author_names
+from .likes import most_liked
+from .models import LeaderboardSnapshot
+from .ratings import top_rated
+
+logger = logging.getLogger(__name__)
+
+# the endpoints cap num at 20, snapshots hold that many and are sliced per request
+LEADERBOARD_SIZE = 20
+# how long the request computing a missing leaderboard keeps the others from doing the same
+COMPUTE_LOCK_SECONDS = 60
+
+
+def highest_rated_data(num_books):
+    stats = list(top_rated(num_books))
+
+    authors = resolve_author_names(stat.book.author for stat in stats)
+    return [
+        {
+            "id": stat.book.id,
+            "key": stat.book.key,
+            "title": stat.book.title,
+            "author": authors[stat.book.author],
+            "cover": stat.book.cover,
+            "avg_rating": round(stat.avg_rating, 1),
+            "review_count": stat.review_count
+        }
+        for stat in stats
+    ]
+
+
+def most_liked_data(num_books):
+    counts = list(most_liked(num_books))
+    authors = resolve_author_names(count.book.author for count in counts)
+
+    return [
+        {
+            "id": count.book.id,
+            "key": count.book.key,
+            "title": count.book.title,
+            "author": authors[count.book.author],
+            "cover": count.book.cover,
+            "likes_count": count.likes
+        }
+        for count in counts
+    ]
+
+
+def most_active_users_data(num_users):
+    users_data = []
+    for activity in most_active(num_users):
+        if activity.latest_book_title is None:
+            latest_activity = None
+        else:
+            latest_activity = {
+                "book_title": activity.latest_book_title,
+                "book_id": activity.latest_book_id,
+                "rating": activity.latest_rating,
+                "date": activity.latest_review_at
+            }
+
+        users_data.append({
+            "id": activity.user_id,
+            "username": activity.user.username,
+            "review_count": activity.review_count,
+            "bio": activity.bio or "No bio available",
+            "latest_activity": latest_activity
+        })
+
+    return users_data
+
+
+LEADERBOARDS = {
+    'highest_rated': highest_rated_data,
+    'most_liked': most_liked_data,
+    'most_active_users': most_active_users_data,
+}
+
+
+def refresh_leaderboard(name):
+    '''recompute one leaderboard and store it as its new snapshot'''
+    # encoded like the api encodes them, so a stored snapshot reads back exactly as it was served
+    entries = json.loads(json.dumps(LEADERBOARDS[name](LEADERBOARD_SIZE), cls=JSONEncoder))
+    snapshot, _ = LeaderboardSnapshot.objects.update_or_create(
+        name=name, defaults={"entries": entries, "computed_at": timezone.now()},
+    )
+    return snapshot
+
+
+def refresh_leaderboards():
+    return [refresh_leaderboard(name) for name in LEADERBOARDS]
+
+
+def stored_leaderboard(name):
+    '''the stored snapshot however old it is, None before the first refresh'''
+    return LeaderboardSnapshot.objects.filter(name=name).first()
+
+
+def compute_missing_leaderboard(name):
+    '''
+    For a leaderboard that was never computed, e.g. right after deploying, before
+    refresh_leaderboards first ran. One request computes and stores it, the ones
+    arriving meanwhile get an empty list instead of running the same aggregation.
+    '''
+    lock = f'leaderboard_compute_{name}'
+    if not cache.add(lock, True, COMPUTE_LOCK_SECONDS):
+        return LeaderboardSnapshot(name=name, entries=[], computed_at=timezone.now())
+    try:
+        logger.warning("Leaderboard %s has no snapshot, computing it on request", name)
+        return refresh_leaderboard(name)
+    finally:
+        cache.delete(lock)
+
+
+def leaderboard_snapshot(name):
+    '''
+    The stored snapshot, kept fresh by `manage.py refresh_leaderboards --loop`. It is
+    served as it is when the job falls behind, requests never recompute a leaderboard.
+    '''
+    return stored_leaderboard(name) or compute_missing_leaderboard(name)
@@ -0,0 +1,22 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import BookLikeCount
+
+LIKED_LIST = "Liked Books"
+
+
+def change_likes(book_id, delta):
+    updated = BookLikeCount.objects.filter(book_id=book_id).update(likes=F('likes') + delta)
+    if updated or delta <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            BookLikeCount.objects.create(book_id=book_id, likes=delta)
+    except IntegrityError:
+        # another request created the row first
+        change_likes(book_id, delta)
+
+
+def most_liked(limit):
+    return BookLikeCount.objects.filter(likes__gt=0).select_related('book').order_by('-likes', 'book_id')[:limit]
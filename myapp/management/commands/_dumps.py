@@ -0,0 +1,68 @@
+import os
+import time
+from abc import ABCMeta, abstractmethod
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand, CommandError
+from myapp.bulkload import restore_deferred_objects, sqlite_bulk_load
+from myapp.dumps import Checkpoint, default_workers
+
+
+class DumpImportCommand(BaseCommand, metaclass=ABCMeta):
+    '''shared options and reporting of the OpenLibrary dump importers'''
+    record_name = "records"
+    # models the importer writes, and the (model, column) indexes it reads while loading
+    bulk_load_models = ()
+    bulk_load_keep = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="OpenLibrary dump file, gzip compressed or not")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Lines per parse job and per transaction")
+        parser.add_argument('--workers', type=int, default=default_workers(), help="Processes parsing json")
+        parser.add_argument(
+            '--checkpoint', help="File recording the progress so an interrupted import resumes "
+                                 "where it stopped, defaults to <path>.checkpoint"
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start over")
+        parser.add_argument(
+            '--bulk-load', action='store_true',
+            help="sqlite only: relax durability and defer index and search index upkeep to the end. "
+                 "Do not use it while the site is serving from the same database"
+        )
+
+    @abstractmethod
+    def run_import(self, options, **kwargs):
+        '''calls the importer with the common options, returns (records, bad lines)'''
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"Dump file '{options['path']}' not found")
+
+        restored = restore_deferred_objects()
+        if restored:
+            self.stderr.write(f"Restored {', '.join(restored)}, left dropped by a bulk load that was killed")
+
+        checkpoint = Checkpoint(options['checkpoint'] or f"{options['path']}.checkpoint", options['path'])
+        if options['restart']:
+            checkpoint.clear()
+        offset, done = checkpoint.load()
+        if offset:
+            self.stdout.write(f"Resuming at byte {offset}, {done} {self.record_name} were already imported")
+
+        start_time = time.time()
+        bulk_load = (
+            sqlite_bulk_load(self.bulk_load_models, self.bulk_load_keep)
+            if options['bulk_load'] else nullcontext()
+        )
+        with bulk_load:
+            total, errors = self.run_import(
+                options,
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                progress=lambda n: self.stdout.write(f"Read {n} {self.record_name}"),
+                checkpoint=checkpoint,
+            )
+        if errors:
+            self.stderr.write(f"Skipped {errors} lines that could not be parsed")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {total} {self.record_name} in {time.time() - start_time:.2f} seconds"
+        ))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from myapp.subjects import rebuild_subject_index
+
+
+class Command(BaseCommand):
+    help = "Fill the Subject and BookSubject tables from the free text Books.subjects column"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true', help="Delete the existing subject index first")
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        total = rebuild_subject_index(
+            batch_size=options['batch_size'],
+            clear=options['clear'],
+            progress=lambda n: self.stdout.write(f"Indexed {n} book subjects"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} book subjects in {time.time() - start_time:.2f} seconds"
+        ))
@@ -0,0 +1,23 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from myapp.autocomplete import build_title_index
+
+
+class Command(BaseCommand):
+    help = "Prebuild the autocomplete title index so web workers can load it without scanning myapp_books"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Where to write the index, defaults to settings.TITLE_INDEX_PATH")
+
+    def handle(self, *args, **options):
+        output = options['output'] or getattr(settings, 'TITLE_INDEX_PATH', None)
+        if not output:
+            raise CommandError("No output path given and settings.TITLE_INDEX_PATH is not set")
+
+        start_time = time.time()
+        index = build_title_index()
+        index.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(index)} titles to {output} in {time.time() - start_time:.2f} seconds"
+        ))
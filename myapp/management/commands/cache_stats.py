@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from myapp.caching import cache_stats, cache_timeout
+
+
+class Command(BaseCommand):
+    help = "Show cache hits and misses per kind of cached result, summed over all worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Set the counters back to zero")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            cache_stats.reset()
+            self.stdout.write(self.style.SUCCESS("Cache counters reset"))
+            return
+
+        for namespace, totals in cache_stats.totals().items():
+            hit_rate = "-" if totals['hit_rate'] is None else f"{totals['hit_rate']:.1%}"
+            self.stdout.write(
+                f"{namespace:<15} ttl {cache_timeout(namespace):>6}s  "
+                f"hits {totals['hits']:>8}  misses {totals['misses']:>8}  hit rate {hit_rate}"
+            )
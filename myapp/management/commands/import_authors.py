@@ -0,0 +1,16 @@
+from myapp.dumps import import_authors
+from myapp.models import Author
+from ._dumps import DumpImportCommand
+
+
+class Command(DumpImportCommand):
+    help = "Import authors from an OpenLibrary authors dump (plain or .gz)"
+    record_name = "authors"
+    bulk_load_models = (Author,)
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--update', action='store_true', help="Update the names of authors that already exist")
+
+    def run_import(self, options, **kwargs):
+        return import_authors(options['path'], update=options['update'], **kwargs)
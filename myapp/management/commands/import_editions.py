@@ -0,0 +1,17 @@
+from myapp.dumps import import_editions
+from myapp.models import NewTable
+from ._dumps import DumpImportCommand
+
+
+class Command(DumpImportCommand):
+    help = (
+        "Import ISBNs into new_table from an OpenLibrary editions dump (plain or .gz), "
+        "books without a cover or publishing year get them from their editions. Run it after import_works"
+    )
+    record_name = "editions"
+    bulk_load_models = (NewTable,)
+    # known isbns of each batch are looked up by work key
+    bulk_load_keep = {(NewTable, 'works_key')}
+
+    def run_import(self, options, **kwargs):
+        return import_editions(options['path'], **kwargs)
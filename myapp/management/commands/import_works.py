@@ -0,0 +1,17 @@
+from myapp.dumps import import_works
+from myapp.models import Books, BookSubject, Subject, SubjectWord
+from ._dumps import DumpImportCommand
+
+
+class Command(DumpImportCommand):
+    help = (
+        "Import books from an OpenLibrary works dump (plain or .gz). "
+        "Works already in the books table are updated, so it can be re-run on a newer dump"
+    )
+    record_name = "works"
+    bulk_load_models = (Books, Subject, SubjectWord, BookSubject)
+    # re-imported books have their subject links replaced by book_id
+    bulk_load_keep = {(BookSubject, 'book_id')}
+
+    def run_import(self, options, **kwargs):
+        return import_works(options['path'], **kwargs)
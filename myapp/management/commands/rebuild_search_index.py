@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp.bulkload import restore_deferred_objects
+from myapp.search import rebuild_fts_index, fts_index_available
+
+
+class Command(BaseCommand):
+    help = "Rebuild the fts5 title index used by /api/search/ from myapp_books"
+
+    def handle(self, *args, **options):
+        if not fts_index_available():
+            raise CommandError("The search index table is missing, run 'python manage.py migrate' first")
+
+        # the search triggers may still be dropped by a killed bulk load
+        restore_deferred_objects()
+        rebuild_fts_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
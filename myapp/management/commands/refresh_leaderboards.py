@@ -0,0 +1,54 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from myapp.leaderboards import refresh_leaderboards
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recompute the highest rated, most liked and most active users leaderboards"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running and refresh every --interval seconds, e.g. as a service next to the web server"
+        )
+        parser.add_argument(
+            '--interval', type=int, default=None,
+            help="Seconds between refreshes with --loop, defaults to settings.LEADERBOARD_REFRESH_SECONDS"
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval is None:
+            interval = getattr(settings, 'LEADERBOARD_REFRESH_SECONDS', 300)
+        if interval <= 0:
+            raise CommandError("--interval must be a positive number of seconds")
+
+        if not options['loop']:
+            self.refresh()
+            return
+
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    self.refresh()
+                except Exception:
+                    # keep serving the last snapshots and try again next round
+                    logger.exception("Refreshing the leaderboards failed")
+                finally:
+                    close_old_connections()
+                time.sleep(max(0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def refresh(self):
+        start_time = time.time()
+        snapshots = refresh_leaderboards()
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {', '.join(snapshot.name for snapshot in snapshots)} in {time.time() - start_time:.2f} seconds"
+        ))
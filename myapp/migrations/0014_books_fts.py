@@ -0,0 +1,58 @@
+from django.db import migrations
+
+
+CREATE_FTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS myapp_books_fts USING fts5(
+        title,
+        content='myapp_books',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS myapp_books_fts_ai AFTER INSERT ON myapp_books BEGIN
+        INSERT INTO myapp_books_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS myapp_books_fts_ad AFTER DELETE ON myapp_books BEGIN
+        INSERT INTO myapp_books_fts(myapp_books_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS myapp_books_fts_au AFTER UPDATE OF title ON myapp_books BEGIN
+        INSERT INTO myapp_books_fts(myapp_books_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO myapp_books_fts(rowid, title) VALUES (new.id, new.title);
+    END
+    """,
+    "INSERT INTO myapp_books_fts(myapp_books_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS myapp_books_fts_ai",
+    "DROP TRIGGER IF EXISTS myapp_books_fts_ad",
+    "DROP TRIGGER IF EXISTS myapp_books_fts_au",
+    "DROP TABLE IF EXISTS myapp_books_fts",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        # fts5 is sqlite only, other backends keep the icontains search
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_merge_20250428_1450'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(CREATE_FTS), run_statements(DROP_FTS)),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_books_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(db_index=True, max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BookSubject',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='myapp.books')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='myapp.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('subject', 'book'), name='unique_book_subject')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 03:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_stats(apps, schema_editor):
+    Review = apps.get_model('myapp', 'Review')
+    BookRatingStats = apps.get_model('myapp', 'BookRatingStats')
+
+    rows = Review.objects.values('book_id').annotate(count=Count('id'), total=Sum('rating'))
+    BookRatingStats.objects.bulk_create([
+        BookRatingStats(
+            book_id=row['book_id'],
+            review_count=row['count'],
+            rating_sum=row['total'],
+            avg_rating=row['total'] / row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_subject_booksubject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookRatingStats',
+            fields=[
+                ('book', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='rating_stats', serialize=False, to='myapp.books')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('avg_rating', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-avg_rating', '-review_count'], name='rating_stats_rank_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 03:15
+
+import django.db.models.deletion
+from collections import Counter
+from django.db import migrations, models
+
+
+def backfill_like_counts(apps, schema_editor):
+    UserBookList = apps.get_model('myapp', 'UserBookList')
+    BookLikeCount = apps.get_model('myapp', 'BookLikeCount')
+
+    counts = Counter()
+    for book_ids in UserBookList.objects.filter(name="Liked Books").values_list('book_ids', flat=True):
+        counts.update(book_ids)
+    BookLikeCount.objects.bulk_create([
+        BookLikeCount(book_id=book_id, likes=likes)
+        for book_id, likes in counts.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_bookratingstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookLikeCount',
+            fields=[
+                ('book', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='like_count', serialize=False, to='myapp.books')),
+                ('likes', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-likes'], name='like_count_rank_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_user_activity(apps, schema_editor):
+    Review = apps.get_model('myapp', 'Review')
+    UserActivity = apps.get_model('myapp', 'UserActivity')
+
+    rows = list(
+        Review.objects.filter(user__isnull=False)
+        .values('user_id').annotate(count=Count('id'), latest_id=Max('id'))
+    )
+    latest = Review.objects.in_bulk([row['latest_id'] for row in rows])
+    UserActivity.objects.bulk_create([
+        UserActivity(
+            user_id=row['user_id'],
+            review_count=row['count'],
+            latest_review_id=row['latest_id'],
+            latest_book_id=latest[row['latest_id']].book_id,
+            latest_rating=latest[row['latest_id']].rating,
+            latest_review_at=latest[row['latest_id']].created_at,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('myapp', '0017_booklikecount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivity',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.IntegerField(default=0)),
+                ('latest_review_id', models.IntegerField(blank=True, null=True)),
+                ('latest_book_id', models.IntegerField(blank=True, null=True)),
+                ('latest_rating', models.IntegerField(blank=True, null=True)),
+                ('latest_review_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-review_count'], name='activity_rank_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_user_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-18 03:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def move_list_books(apps, schema_editor):
+    '''copy the book ids out of the json lists, genre names stay behind in book_ids'''
+    UserBookList = apps.get_model('myapp', 'UserBookList')
+    UserBookListEntry = apps.get_model('myapp', 'UserBookListEntry')
+    BookLikeCount = apps.get_model('myapp', 'BookLikeCount')
+
+    entries = []
+    for book_list in UserBookList.objects.iterator():
+        items = book_list.book_ids or []
+        book_ids = [item for item in items if isinstance(item, int) and not isinstance(item, bool)]
+        if not book_ids:
+            continue
+        entries.extend(
+            UserBookListEntry(book_list_id=book_list.id, book_id=book_id)
+            for book_id in dict.fromkeys(book_ids)
+        )
+        book_list.book_ids = [item for item in items if item not in book_ids]
+        book_list.save(update_fields=['book_ids'])
+    UserBookListEntry.objects.bulk_create(entries, batch_size=1000)
+
+    # the json lists could hold a book twice, count likes the way the entries do
+    BookLikeCount.objects.all().delete()
+    counts = (
+        UserBookListEntry.objects.filter(book_list__name="Liked Books")
+        .values('book_id').annotate(likes=Count('id'))
+    )
+    BookLikeCount.objects.bulk_create([
+        BookLikeCount(book_id=row['book_id'], likes=row['likes'])
+        for row in counts
+    ], batch_size=1000)
+
+
+def restore_list_books(apps, schema_editor):
+    UserBookList = apps.get_model('myapp', 'UserBookList')
+    UserBookListEntry = apps.get_model('myapp', 'UserBookListEntry')
+
+    for book_list in UserBookList.objects.filter(entries__isnull=False).distinct().iterator():
+        book_ids = list(
+            UserBookListEntry.objects.filter(book_list_id=book_list.id)
+            .order_by('id').values_list('book_id', flat=True)
+        )
+        book_list.book_ids = (book_list.book_ids or []) + book_ids
+        book_list.save(update_fields=['book_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_useractivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBookListEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_id', models.IntegerField()),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('book_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='myapp.userbooklist')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('book_list', 'book_id'), name='unique_list_entry')],
+            },
+        ),
+        migrations.RunPython(move_list_books, restore_list_books),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    '''
+    new_table used to be created by hand next to the books, so take it over
+    without touching an existing table and index the work key every lookup uses.
+    '''
+
+    dependencies = [
+        ('myapp', '0019_userbooklistentry'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterModelOptions(name='newtable', options={}),
+                migrations.AddIndex(
+                    model_name='newtable',
+                    index=models.Index(fields=['works_key'], name='new_table_works_key_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE TABLE IF NOT EXISTS "new_table" ('
+                    '"id" integer NOT NULL PRIMARY KEY AUTOINCREMENT, '
+                    '"works_key" varchar(255) NOT NULL, '
+                    '"isbn_10" varchar(255) NOT NULL)',
+                    migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    'CREATE INDEX IF NOT EXISTS "new_table_works_key_idx" ON "new_table" ("works_key")',
+                    'DROP INDEX IF EXISTS "new_table_works_key_idx"',
+                ),
+            ],
+        ),
+    ]
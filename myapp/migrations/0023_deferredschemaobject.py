@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0022_leaderboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeferredSchemaObject',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('type', models.CharField(max_length=10)),
+                ('table', models.CharField(max_length=255)),
+                ('sql', models.TextField()),
+            ],
+        ),
+    ]
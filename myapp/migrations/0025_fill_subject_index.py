@@ -0,0 +1,80 @@
+# Generated by Django 5.2 on 2026-10-18 14:05
+
+import ast
+import unicodedata
+
+from django.db import migrations
+
+
+# copies of myapp.prefix_index.normalize and myapp.subjects.split_subjects as they were
+# when this migration was written, importing them would load the current models
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+def split_subjects(text):
+    if not text:
+        return []
+
+    text = text.strip()
+    parts = None
+    if text.startswith('['):
+        try:
+            parts = [str(part) for part in ast.literal_eval(text)]
+        except (ValueError, SyntaxError):
+            text = text.strip('[]')
+    if parts is None:
+        parts = text.replace(';', ',').split(',')
+
+    names = []
+    for part in parts:
+        name = normalize(part.strip(' \'"'))[:255]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def index_book_subjects(apps, schema_editor):
+    '''
+    the subject filter only reads the Subject/BookSubject tables, fill them for the books
+    that were there before them (what build_subject_index does, with the historical models)
+    '''
+    Books = apps.get_model('myapp', 'Books')
+    Subject = apps.get_model('myapp', 'Subject')
+    BookSubject = apps.get_model('myapp', 'BookSubject')
+
+    known = dict(Subject.objects.values_list('name', 'id'))
+    rows = Books.objects.exclude(subjects__isnull=True).exclude(subjects='').values_list('id', 'subjects')
+
+    def flush(batch):
+        missing = {name for _, names in batch for name in names if name not in known}
+        if missing:
+            Subject.objects.bulk_create([Subject(name=name) for name in missing], ignore_conflicts=True)
+            known.update(Subject.objects.filter(name__in=missing).values_list('name', 'id'))
+        BookSubject.objects.bulk_create([
+            BookSubject(book_id=book_id, subject_id=known[name])
+            for book_id, names in batch
+            for name in names
+        ], ignore_conflicts=True)
+
+    batch = []
+    for book_id, text in rows.iterator(chunk_size=5000):
+        batch.append((book_id, split_subjects(text)))
+        if len(batch) >= 5000:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0024_cachecounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_book_subjects, migrations.RunPython.noop),
+    ]
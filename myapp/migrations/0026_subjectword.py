@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 05:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def add_subject_words(apps, schema_editor):
+    '''a row per word of every subject name, what myapp.subjects.name_words gives'''
+    Subject = apps.get_model('myapp', 'Subject')
+    SubjectWord = apps.get_model('myapp', 'SubjectWord')
+
+    batch = []
+    for subject_id, name in Subject.objects.values_list('id', 'name').iterator(chunk_size=5000):
+        words = name.split(' ')
+        batch.extend(SubjectWord(subject_id=subject_id, words=' '.join(words[i:])) for i in range(len(words)))
+        if len(batch) >= 5000:
+            SubjectWord.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    SubjectWord.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0025_fill_subject_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectWord',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('words', models.CharField(max_length=255)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='words', to='myapp.subject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('words', 'subject'), name='unique_subject_word')],
+            },
+        ),
+        migrations.RunPython(add_subject_words, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 05:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0026_subjectword'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EditionYear',
+            fields=[
+                ('book', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='edition_year', serialize=False, to='myapp.books')),
+                ('year', models.IntegerField()),
+            ],
+        ),
+    ]
@@ -10,7 +10,9 @@ class NewTable(models.Model):
     
     class Meta:
         db_table = 'new_table'
-        managed = False
+        indexes = [
+            models.Index(fields=['works_key'], name='new_table_works_key_idx'),
+        ]
 
 
 class Review(models.Model):
@@ -21,6 +23,11 @@ class Review(models.Model):
     rating = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['book_id', 'created_at'], name='review_book_created_idx'),
+        ]
+
 class UserInfo(models.Model):
     id = models.AutoField(primary_key=True)
     user_id = models.ForeignKey(User, on_delete=models.CASCADE, blank = True, null = True)
@@ -34,8 +41,19 @@ class UserBookList(models.Model):
     id = models.AutoField(primary_key=True)
     user_id = models.ForeignKey(User, on_delete=models.CASCADE, blank = True, null = True)
     name = models.CharField(max_length=255)
+    # books live in UserBookListEntry, this only holds the genres of "Blocked Books"
     book_ids = models.JSONField(default=list)
 
+class UserBookListEntry(models.Model):
+    book_list = models.ForeignKey(UserBookList, on_delete=models.CASCADE, related_name='entries')
+    book_id = models.IntegerField()
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book_list', 'book_id'], name='unique_list_entry'),
+        ]
+
 class Books(models.Model):
     id = models.AutoField(primary_key=True)
     key = models.CharField(max_length=255, unique=True, db_index=True)
@@ -50,3 +68,105 @@ class Author(models.Model):
     id = models.AutoField(primary_key=True)
     key = models.CharField(max_length=255, unique=True, db_index=True)
     name = models.CharField(max_length=255)
+
+class Subject(models.Model):
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=255, unique=True, db_index=True)
+
+class SubjectWord(models.Model):
+    '''
+    A subject name from each of its words on ("science fiction" -> "science fiction", "fiction"),
+    so a term matches at any word of a name with a prefix range on the index
+    '''
+    id = models.AutoField(primary_key=True)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='words')
+    words = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['words', 'subject'], name='unique_subject_word'),
+        ]
+
+class BookSubject(models.Model):
+    id = models.AutoField(primary_key=True)
+    book = models.ForeignKey(Books, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['subject', 'book'], name='unique_book_subject'),
+        ]
+
+class EditionYear(models.Model):
+    '''
+    Earliest edition year of books whose first_published came from their editions
+    (import_editions), later batches may lower it. Years from the work itself are left alone.
+    '''
+    book = models.OneToOneField(
+        Books, primary_key=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='edition_year'
+    )
+    year = models.IntegerField()
+
+class BookRatingStats(models.Model):
+    book = models.OneToOneField(
+        Books, primary_key=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='rating_stats'
+    )
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    avg_rating = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-avg_rating', '-review_count'], name='rating_stats_rank_idx'),
+        ]
+
+class BookLikeCount(models.Model):
+    book = models.OneToOneField(
+        Books, primary_key=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='like_count'
+    )
+    likes = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-likes'], name='like_count_rank_idx'),
+        ]
+
+class UserActivity(models.Model):
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='activity')
+    review_count = models.IntegerField(default=0)
+    latest_review_id = models.IntegerField(null=True, blank=True)
+    latest_book_id = models.IntegerField(null=True, blank=True)
+    latest_rating = models.IntegerField(null=True, blank=True)
+    latest_review_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-review_count'], name='activity_rank_idx'),
+        ]
+
+class LeaderboardSnapshot(models.Model):
+    '''the latest computed entries of one homepage leaderboard, see leaderboards.py'''
+    name = models.CharField(max_length=50, primary_key=True)
+    entries = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+
+class CacheCounter(models.Model):
+    '''cache hits or misses of one namespace summed over every process, see caching.py'''
+    namespace = models.CharField(max_length=50)
+    kind = models.CharField(max_length=10)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['namespace', 'kind'], name='unique_cache_counter'),
+        ]
+
+class DeferredSchemaObject(models.Model):
+    '''an index or trigger dropped for a bulk load, kept until it is recreated, see bulkload.py'''
+    name = models.CharField(max_length=255, primary_key=True)
+    type = models.CharField(max_length=10)
+    table = models.CharField(max_length=255)
+    sql = models.TextField()
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import json
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from .caching import cache_get, cache_set
+
+# largest AutoField id, what Books and Review use. Anything bigger cannot be a row
+# and would overflow the database's integers
+MAX_ID = 2147483647
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def wants_cursor_pagination(request):
+    '''cursor mode is opt in, with ?paginate=cursor or by passing a cursor from a previous page'''
+    return request.GET.get('paginate') == 'cursor' or 'cursor' in request.GET
+
+
+def encode_cursor(direction, book_id):
+    raw = json.dumps({"d": direction, "id": book_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, book_id = data["d"], int(data["id"])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+    if direction not in ("next", "prev") or not 0 < book_id <= MAX_ID:
+        raise InvalidCursor(token)
+    return direction, book_id
+
+
+def queryset_fetcher(queryset):
+    '''keyset fetch function over a queryset, see cursor_paginate'''
+    def fetch(after=None, before=None, limit=10):
+        if before is not None:
+            return list(queryset.filter(id__lt=before).order_by('-id')[:limit])
+        page = queryset if after is None else queryset.filter(id__gt=after)
+        return list(page.order_by('id')[:limit])
+    return fetch
+
+
+def compare_to_row(model, field, operator, row_id):
+    '''
+    (field, id) <operator> (field, id) of row row_id, as one row value comparison.
+    sqlite turns it into a range on an index ending in field (the id comes with
+    every index), "field < x OR (field = x AND id < y)" only narrows the leading columns.
+    '''
+    quote = connection.ops.quote_name
+    table, column, pk = quote(model._meta.db_table), quote(model._meta.get_field(field).column), quote('id')
+    return RawSQL(
+        f'({table}.{column}, {table}.{pk}) {operator} (SELECT {column}, {pk} FROM {table} WHERE {pk} = %s)',
+        (row_id,), output_field=BooleanField(),
+    )
+
+
+def newest_first_fetcher(queryset, field='created_at'):
+    '''
+    keyset fetch function that pages newest first on (field, id), see cursor_paginate.
+    The cursor only holds the id, the anchor's timestamp is looked up in the same query.
+    '''
+    def fetch(after=None, before=None, limit=10):
+        if before is not None:
+            newer = compare_to_row(queryset.model, field, '>', before)
+            return list(queryset.filter(newer).order_by(field, 'id')[:limit])
+        page = queryset
+        if after is not None:
+            page = page.filter(compare_to_row(queryset.model, field, '<', after))
+        return list(page.order_by(f'-{field}', '-id')[:limit])
+    return fetch
+
+
+def cursor_paginate(fetch, token, per_page):
+    '''
+    One page of results keyed on a row's position, without COUNT or OFFSET.
+
+    fetch(after=id, limit=n) must return the rows that come after row id in
+    display order, fetch(before=id, limit=n) the rows before it, nearest first.
+    queryset_fetcher orders by id, newest_first_fetcher by creation time.
+    Returns (items, next_token, prev_token), tokens are None at either end.
+    '''
+    direction, anchor = decode_cursor(token) if token else ("next", None)
+
+    if direction == "next":
+        items = fetch(after=anchor, limit=per_page + 1)
+        has_next, has_prev = len(items) > per_page, anchor is not None
+        items = items[:per_page]
+    else:
+        items = fetch(before=anchor, limit=per_page + 1)
+        has_next, has_prev = True, len(items) > per_page
+        items = list(reversed(items[:per_page]))
+
+    next_token = encode_cursor("next", items[-1].id) if has_next and items else None
+    prev_token = encode_cursor("prev", items[0].id) if has_prev and items else None
+    return items, next_token, prev_token
+
+
+def cached_count(namespace, value, count):
+    '''total for a result set, computed once and shared between pages (CACHE_TIMEOUTS['result_counts'])'''
+    digest = hashlib.md5(value.encode()).hexdigest()
+    cache_key = f'count_{namespace}_{digest}'
+    total = cache_get('result_counts', cache_key)
+    if total is None:
+        total = count()
+        cache_set('result_counts', cache_key, total)
+    return total
@@ -0,0 +1,228 @@
+import heapq
+import pickle
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+FORMAT_VERSION = 1
+TRIGRAM = 3
+
+
+def normalize(text):
+    '''casefold, strip accents and collapse whitespace so "Émile  Zola" == "emile zola"'''
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+class PrefixIndex:
+    '''
+    In-memory sorted-prefix index answering top-k completions.
+
+    Entries are (item_id, label, score). Labels are normalized and kept
+    sorted in parallel arrays, so a prefix is a contiguous range found with
+    two bisects. Small ranges are ranked on the fly, the top results of
+    large ranges (short prefixes like "th") are memoized until an entry
+    under that prefix changes.
+    '''
+
+    def __init__(self, entries=(), scan_limit=2000, cache_k=20):
+        rows = sorted(
+            (normalize(label), item_id, label, score)
+            for item_id, label, score in entries
+        )
+        self._keys = [row[0] for row in rows]
+        self._ids = array('q', (row[1] for row in rows))
+        self._labels = [row[2] for row in rows]
+        self._scores = array('q', (row[3] for row in rows))
+        self._key_by_id = {row[1]: row[0] for row in rows}
+        self._top_cache = {}
+        self._lock = threading.RLock()
+        self.scan_limit = scan_limit
+        self.cache_k = cache_k
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, item_id):
+        return item_id in self._key_by_id
+
+    def complete(self, prefix, k=5):
+        '''returns up to k (item_id, label) pairs whose label starts with prefix, best score first'''
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            if k <= self.cache_k and prefix in self._top_cache:
+                return self._top_cache[prefix][:k]
+
+            lo = bisect_left(self._keys, prefix)
+            hi = bisect_right(self._keys, prefix + '\U0010ffff', lo)
+
+            if hi - lo <= self.scan_limit or k > self.cache_k:
+                return self._rank(lo, hi, k)
+
+            top = self._rank(lo, hi, self.cache_k)
+            self._top_cache[prefix] = top
+            return top[:k]
+
+    def _rank(self, lo, hi, k):
+        scores = self._scores
+        positions = heapq.nlargest(k, range(lo, hi), key=lambda i: (scores[i], -i))
+        return [(self._ids[i], self._labels[i]) for i in positions]
+
+    def _position(self, item_id):
+        key = self._key_by_id[item_id]
+        i = bisect_left(self._keys, key)
+        while self._ids[i] != item_id:
+            i += 1
+        return i
+
+    def _invalidate(self, key):
+        if self._top_cache:
+            for end in range(1, len(key) + 1):
+                self._top_cache.pop(key[:end], None)
+
+    def add(self, item_id, label, score=None):
+        '''insert a new entry or rename an existing one, keeping its score unless one is given'''
+        key = normalize(label)
+        with self._lock:
+            if item_id in self._key_by_id:
+                if score is None and self._labels[self._position(item_id)] == label:
+                    # saved without a rename, nothing to do
+                    return
+                old_score = self.remove(item_id)
+                if score is None:
+                    score = old_score
+            score = score or 0
+
+            i = bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key and self._ids[i] < item_id:
+                i += 1
+            self._keys.insert(i, key)
+            self._ids.insert(i, item_id)
+            self._labels.insert(i, label)
+            self._scores.insert(i, score)
+            self._key_by_id[item_id] = key
+            self._invalidate(key)
+
+    def remove(self, item_id):
+        '''drop an entry, returns its score or None if it was not indexed'''
+        with self._lock:
+            if item_id not in self._key_by_id:
+                return None
+            i = self._position(item_id)
+            score = self._scores[i]
+            del self._keys[i], self._labels[i]
+            del self._ids[i], self._scores[i]
+            self._invalidate(self._key_by_id.pop(item_id))
+            return score
+
+    def bump(self, item_id, delta=1):
+        '''change the score of an entry in place'''
+        with self._lock:
+            if item_id not in self._key_by_id:
+                return
+            i = self._position(item_id)
+            self._scores[i] = max(0, self._scores[i] + delta)
+            self._invalidate(self._keys[i])
+
+    def save(self, path):
+        with self._lock:
+            state = (FORMAT_VERSION, self._keys, self._ids, self._labels, self._scores)
+        with open(path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, 'rb') as file:
+            version, keys, ids, labels, scores = pickle.load(file)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported prefix index format {version}")
+
+        index = cls(**kwargs)
+        index._keys, index._ids, index._labels, index._scores = keys, ids, labels, scores
+        index._key_by_id = dict(zip(ids, keys))
+        return index
+
+
+def trigrams(key):
+    return {key[i:i + TRIGRAM] for i in range(len(key) - TRIGRAM + 1)}
+
+
+class InfixIndex(PrefixIndex):
+    '''
+    PrefixIndex that also finds labels containing the query anywhere.
+
+    Prefix matches come first. When there are fewer than k of them the rest
+    is filled with labels that contain the query, found by intersecting the
+    posting lists of its trigrams and ranked by score. Queries shorter than a
+    trigram only match prefixes. Every candidate is checked against its
+    current label, so removals and renames leave stale postings behind
+    instead of rewriting the lists, they go away when the index is rebuilt.
+    '''
+
+    def __init__(self, entries=(), **kwargs):
+        entries = list(entries)
+        super().__init__(entries, **kwargs)
+        self._trigrams = defaultdict(lambda: array('q'))
+        self._score_by_id = {}
+        for item_id, label, score in entries:
+            self._index_infix(item_id, normalize(label), score)
+
+    def _index_infix(self, item_id, key, score):
+        self._score_by_id[item_id] = score
+        for trigram in trigrams(key):
+            self._trigrams[trigram].append(item_id)
+
+    def complete(self, query, k=5):
+        results = super().complete(query, k)
+        key = normalize(query)
+        if len(results) >= k or len(key) < TRIGRAM:
+            return results
+
+        with self._lock:
+            postings = sorted((self._trigrams.get(trigram, ()) for trigram in trigrams(key)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            candidates.difference_update(item_id for item_id, _ in results)
+            # the trigrams can all be there without being next to each other
+            keys = self._key_by_id
+            matches = [item_id for item_id in candidates if key in keys.get(item_id, '')]
+            best = heapq.nsmallest(
+                k - len(results), matches,
+                key=lambda item_id: (-self._score_by_id[item_id], keys[item_id], item_id)
+            )
+            return results + [(item_id, self._labels[self._position(item_id)]) for item_id in best]
+
+    def add(self, item_id, label, score=None):
+        with self._lock:
+            old_key = self._key_by_id.get(item_id)
+            super().add(item_id, label, score)
+            key = self._key_by_id[item_id]
+            score = self._scores[self._position(item_id)]
+            if key == old_key:
+                # same trigrams, their postings are already there
+                self._score_by_id[item_id] = score
+            else:
+                self._index_infix(item_id, key, score)
+
+    def remove(self, item_id):
+        with self._lock:
+            self._score_by_id.pop(item_id, None)
+            return super().remove(item_id)
+
+    def bump(self, item_id, delta=1):
+        with self._lock:
+            super().bump(item_id, delta)
+            if item_id in self._key_by_id:
+                self._score_by_id[item_id] = self._scores[self._position(item_id)]
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        index = super().load(path, **kwargs)
+        for item_id, key, score in zip(index._ids, index._keys, index._scores):
+            index._index_infix(item_id, key, score)
+        return index
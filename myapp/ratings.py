@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Sum
+from .models import BookRatingStats, Review
+
+MIN_REVIEWS_FOR_RANKING = 3
+
+
+def record_rating(book_id, rating):
+    '''add one new review to the running totals of a book, in a single UPDATE'''
+    rating = int(rating)
+    updated = BookRatingStats.objects.filter(book_id=book_id).update(
+        review_count=F('review_count') + 1,
+        rating_sum=F('rating_sum') + rating,
+        avg_rating=ExpressionWrapper(
+            (F('rating_sum') + rating) * 1.0 / (F('review_count') + 1),
+            output_field=FloatField()
+        ),
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            BookRatingStats.objects.create(
+                book_id=book_id, review_count=1, rating_sum=rating, avg_rating=rating
+            )
+    except IntegrityError:
+        # another request created the row first
+        record_rating(book_id, rating)
+
+
+def refresh_rating(book_id):
+    '''recount a book from its reviews, used when a review is edited or deleted'''
+    totals = Review.objects.filter(book_id=book_id).aggregate(count=Count('id'), total=Sum('rating'))
+    if not totals['count']:
+        BookRatingStats.objects.filter(book_id=book_id).delete()
+        return
+
+    BookRatingStats.objects.update_or_create(book_id=book_id, defaults={
+        "review_count": totals['count'],
+        "rating_sum": totals['total'],
+        "avg_rating": totals['total'] / totals['count'],
+    })
+
+
+def top_rated(limit):
+    '''best average rating first, only books with a cover and enough reviews'''
+    return BookRatingStats.objects.filter(
+        review_count__gte=MIN_REVIEWS_FOR_RANKING,
+        book__cover__gt=0
+    ).select_related('book').order_by('-avg_rating', '-review_count')[:limit]
@@ -0,0 +1,107 @@
+import random
+import threading
+from array import array
+from bisect import bisect_left
+from asgiref.sync import sync_to_async
+from .autocomplete import LocalIndex
+from .models import Books
+
+
+def eligible_books():
+    '''books the random and recommended endpoints may show: they need a description and a cover'''
+    return Books.objects.filter(description__isnull=False, cover__isnull=False, cover__gt=0)
+
+
+def is_eligible(book):
+    return book.description is not None and book.cover is not None and book.cover > 0
+
+
+class EligibleIds:
+    '''
+    The ids of all eligible books in a sorted array('I') (4 bytes per book),
+    safe to change from the signals while other threads draw from it.
+    '''
+
+    def __init__(self, ids):
+        self._ids = ids
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(self._ids.tolist())
+
+    def add(self, book_id):
+        with self._lock:
+            i = bisect_left(self._ids, book_id)
+            if i == len(self._ids) or self._ids[i] != book_id:
+                self._ids.insert(i, book_id)
+
+    def discard(self, book_id):
+        with self._lock:
+            i = bisect_left(self._ids, book_id)
+            if i < len(self._ids) and self._ids[i] == book_id:
+                del self._ids[i]
+
+    def sample(self, k):
+        with self._lock:
+            k = max(0, min(k, len(self._ids)))
+            return random.sample(self._ids, k) if k else []
+
+
+def load_eligible_ids():
+    return EligibleIds(array('I', eligible_books().order_by('id').values_list('id', flat=True).iterator(chunk_size=50000)))
+
+
+class EligibleBookSampler:
+    '''
+    Draws random eligible books: random.sample over the ids in memory and one id__in query.
+    The ids are reloaded every SAMPLER_REFRESH_SECONDS in the background while the old
+    ones keep serving (see LocalIndex), kept current in between by the Books signals,
+    and reloaded early if a draw hits ids that are gone.
+    '''
+
+    def __init__(self):
+        self._ids = LocalIndex('sampler', load_eligible_ids, 'SAMPLER_REFRESH_SECONDS', 3600)
+
+    def __len__(self):
+        ids = self._ids.loaded()
+        return len(ids) if ids is not None else 0
+
+    def refresh(self):
+        self._ids.rebuild()
+
+    def add(self, book_id):
+        self._ids.update(lambda ids: ids.add(book_id))
+
+    def discard(self, book_id):
+        self._ids.update(lambda ids: ids.discard(book_id))
+
+    def sample_ids(self, k):
+        return self._ids.get().sample(k)
+
+    def sample_books(self, k):
+        '''k random eligible books, in random order'''
+        for attempt in range(2):
+            ids = self.sample_ids(k)
+            books = eligible_books().in_bulk(ids)
+            if len(books) == len(ids) or attempt:
+                break
+            # the array is out of date, e.g. books deleted outside of Django
+            self.refresh()
+        return [books[book_id] for book_id in ids if book_id in books]
+
+    async def asample_books(self, k):
+        '''sample_books for the async views, a reload of the id array still runs in a thread'''
+        for attempt in range(2):
+            ids = await sync_to_async(self.sample_ids)(k)
+            books = await eligible_books().ain_bulk(ids)
+            if len(books) == len(ids) or attempt:
+                break
+            await sync_to_async(self.refresh)()
+        return [books[book_id] for book_id in ids if book_id in books]
+
+
+book_sampler = EligibleBookSampler()
@@ -0,0 +1,106 @@
+import re
+from django.db import connection
+from .models import Books
+
+FTS_TABLE = 'myapp_books_fts'
+
+_TOKEN_RE = re.compile(r'\w+')
+_fts_available = None
+
+
+def build_match_expression(query):
+    '''
+    Turns free text from the search bar into an fts5 MATCH expression.
+    Every word is quoted and used as a prefix, so "harry pot" finds
+    "Harry Potter and the ..." no matter the word order.
+    '''
+    tokens = _TOKEN_RE.findall(query.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def fts_index_available():
+    '''check once per process if the fts table has been migrated'''
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def rebuild_fts_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def books_in_order(book_ids, queryset=None):
+    '''one query for all ids, keeps the given order and skips ids without a book'''
+    books = (Books.objects if queryset is None else queryset).in_bulk(book_ids)
+    return [books[book_id] for book_id in book_ids if book_id in books]
+
+
+class TitleSearchResults:
+    '''
+    Lazy, Paginator compatible result set for a title search.
+    count() and slicing each run one query against the fts index,
+    books are ordered by bm25 rank and then by id.
+    '''
+
+    def __init__(self, match_expression):
+        self.match_expression = match_expression
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                    [self.match_expression]
+                )
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        offset = index.start or 0
+        limit = (index.stop if index.stop is not None else self.count()) - offset
+        if limit <= 0:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT rowid FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s
+                ORDER BY rank, rowid
+                LIMIT %s OFFSET %s
+            """, [self.match_expression, limit, offset])
+            book_ids = [row[0] for row in cursor.fetchall()]
+
+        return books_in_order(book_ids)
+
+    def fetch(self, after=None, before=None, limit=10):
+        '''keyset page ordered by id, fts5 walks rowids natively so this never needs an OFFSET'''
+        if before is not None:
+            condition, params, order = "AND rowid < %s", [before], "DESC"
+        elif after is not None:
+            condition, params, order = "AND rowid > %s", [after], "ASC"
+        else:
+            condition, params, order = "", [], "ASC"
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT rowid FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s {condition}
+                ORDER BY rowid {order}
+                LIMIT %s
+            """, [self.match_expression, *params, limit])
+            book_ids = [row[0] for row in cursor.fetchall()]
+
+        return books_in_order(book_ids)
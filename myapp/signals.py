@@ -0,0 +1,132 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .activity import record_activity, refresh_activity
+from .autocomplete import update_title_index, update_username_index
+from .bookcache import invalidate_book
+from .likes import LIKED_LIST, change_likes
+from .models import Books, Review, User, UserBookList, UserBookListEntry
+from .ratings import record_rating, refresh_rating
+from .sampler import book_sampler, is_eligible
+from .subjects import sync_book_subjects
+
+
+def bump_title_popularity(book_id, delta):
+    transaction.on_commit(lambda: update_title_index(lambda index: index.bump(book_id, delta)))
+
+
+def bump_user_activity(user_id, delta):
+    if user_id is not None:
+        transaction.on_commit(lambda: update_username_index(lambda index: index.bump(user_id, delta)))
+
+
+@receiver(post_save, sender=Books)
+def index_book_title(sender, instance, **kwargs):
+    book_id, title = instance.id, instance.title
+    transaction.on_commit(lambda: update_title_index(lambda index: index.add(book_id, title)))
+
+
+@receiver(post_save, sender=Books)
+def index_book_subjects(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'subjects' not in update_fields:
+        return
+    if created and not instance.subjects:
+        return
+    sync_book_subjects(instance)
+
+
+@receiver(post_save, sender=Books)
+def sample_book(sender, instance, **kwargs):
+    book_id = instance.id
+    if is_eligible(instance):
+        transaction.on_commit(lambda: book_sampler.add(book_id))
+    else:
+        transaction.on_commit(lambda: book_sampler.discard(book_id))
+
+
+@receiver(post_save, sender=Books)
+@receiver(post_delete, sender=Books)
+def uncache_book(sender, instance, **kwargs):
+    invalidate_book(instance.id, instance.key)
+
+
+@receiver(post_delete, sender=Books)
+def unsample_book(sender, instance, **kwargs):
+    book_id = instance.id
+    transaction.on_commit(lambda: book_sampler.discard(book_id))
+
+
+@receiver(post_delete, sender=Books)
+def unindex_book_title(sender, instance, **kwargs):
+    book_id = instance.id
+    transaction.on_commit(lambda: update_title_index(lambda index: index.remove(book_id)))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def uncache_reviewed_book(sender, instance, **kwargs):
+    invalidate_book(instance.book_id)
+
+
+@receiver(post_save, sender=User)
+def uncache_renamed_reviewer(sender, instance, created, update_fields=None, **kwargs):
+    # cached reviews show the username
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    for book_id in Review.objects.filter(user=instance).values_list('book_id', flat=True).distinct():
+        invalidate_book(book_id)
+
+
+@receiver(post_save, sender=User)
+def index_username(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and 'username' not in update_fields:
+        return
+    user_id, username = instance.id, instance.username
+    transaction.on_commit(lambda: update_username_index(lambda index: index.add(user_id, username)))
+
+
+@receiver(post_delete, sender=User)
+def unindex_username(sender, instance, **kwargs):
+    user_id = instance.id
+    transaction.on_commit(lambda: update_username_index(lambda index: index.remove(user_id)))
+
+
+@receiver(post_save, sender=Review)
+def review_added(sender, instance, created, **kwargs):
+    if created:
+        record_rating(instance.book_id, instance.rating)
+        record_activity(instance)
+        bump_title_popularity(instance.book_id, 1)
+        bump_user_activity(instance.user_id, 1)
+    else:
+        refresh_rating(instance.book_id)
+        refresh_activity(instance.user_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    refresh_rating(instance.book_id)
+    refresh_activity(instance.user_id)
+    bump_title_popularity(instance.book_id, -1)
+    bump_user_activity(instance.user_id, -1)
+
+
+def _in_liked_list(entry):
+    try:
+        return entry.book_list.name == LIKED_LIST
+    except UserBookList.DoesNotExist:
+        return False
+
+
+@receiver(post_save, sender=UserBookListEntry)
+def count_like(sender, instance, created, **kwargs):
+    if created and _in_liked_list(instance):
+        change_likes(instance.book_id, 1)
+        bump_title_popularity(instance.book_id, 1)
+
+
+@receiver(post_delete, sender=UserBookListEntry)
+def uncount_like(sender, instance, **kwargs):
+    if _in_liked_list(instance):
+        change_likes(instance.book_id, -1)
+        bump_title_popularity(instance.book_id, -1)
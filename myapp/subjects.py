@@ -0,0 +1,134 @@
+import ast
+from django.db.models import Q
+from .models import Books, BookSubject, Subject, SubjectWord
+from .prefix_index import normalize
+
+
+def split_subjects(text):
+    '''
+    Books.subjects is free text, usually "Fiction, Fantasy" but older rows
+    hold a python/json list. Returns the normalized, de-duplicated names.
+    '''
+    if not text:
+        return []
+
+    text = text.strip()
+    parts = None
+    if text.startswith('['):
+        try:
+            parts = [str(part) for part in ast.literal_eval(text)]
+        except (ValueError, SyntaxError):
+            text = text.strip('[]')
+    if parts is None:
+        parts = text.replace(';', ',').split(',')
+
+    names = []
+    for part in parts:
+        name = normalize(part.strip(' \'"'))[:255]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+# sorts after every character, name < term + PREFIX_END holds for all names starting with term
+PREFIX_END = '\U0010ffff'
+
+
+def name_words(name):
+    '''the SubjectWord.words of a normalized name, the name from each of its words on'''
+    words = name.split(' ')
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+def matching_subjects(*terms):
+    '''
+    subjects with a word starting with any of the terms, "fiction" matches "science fiction"
+    and "fantasy" matches "epic fantasy" like the old icontains did. The words are normalized
+    so a range on the SubjectWord index finds them, sqlite cannot use an index for LIKE
+    (what name__contains and name__startswith turn into).
+    '''
+    condition = Q()
+    for term in terms:
+        term = normalize(term)
+        if term:
+            condition |= Q(words__gte=term, words__lt=term + PREFIX_END)
+    if not condition:
+        return Subject.objects.none()
+    return Subject.objects.filter(id__in=SubjectWord.objects.filter(condition).values('subject_id'))
+
+
+def books_with_subjects(subjects):
+    '''ids of books tagged with any of the given subjects, as a subquery for id__in'''
+    return BookSubject.objects.filter(subject__in=subjects).values('book_id')
+
+
+def subject_ids(names, known=None):
+    '''map subject names to ids, creating the missing ones'''
+    known = {} if known is None else known
+    missing = [name for name in names if name not in known]
+    if missing:
+        Subject.objects.bulk_create([Subject(name=name) for name in missing], ignore_conflicts=True)
+        created = dict(Subject.objects.filter(name__in=missing).values_list('name', 'id'))
+        SubjectWord.objects.bulk_create([
+            SubjectWord(subject_id=subject_id, words=words)
+            for name, subject_id in created.items()
+            for words in name_words(name)
+        ], ignore_conflicts=True)
+        known.update(created)
+    return {name: known[name] for name in names}
+
+
+def index_subjects(rows, known=None):
+    '''
+    Bulk indexing for the management command and importers.
+    rows are (book_id, subjects text) pairs, already indexed pairs are skipped.
+    '''
+    rows = [(book_id, split_subjects(text)) for book_id, text in rows]
+    ids = subject_ids({name for _, names in rows for name in names}, known)
+    links = [
+        BookSubject(book_id=book_id, subject_id=ids[name])
+        for book_id, names in rows
+        for name in names
+    ]
+    BookSubject.objects.bulk_create(links, ignore_conflicts=True)
+    return len(links)
+
+
+def sync_book_subjects(book):
+    '''bring the join rows of a single book in line with its subjects text'''
+    wanted = set(subject_ids(split_subjects(book.subjects)).values())
+    current = dict(BookSubject.objects.filter(book=book).values_list('subject_id', 'id'))
+
+    stale = [link_id for subject_id, link_id in current.items() if subject_id not in wanted]
+    if stale:
+        BookSubject.objects.filter(id__in=stale).delete()
+
+    new_links = [
+        BookSubject(book=book, subject_id=subject_id)
+        for subject_id in wanted
+        if subject_id not in current
+    ]
+    if new_links:
+        BookSubject.objects.bulk_create(new_links, ignore_conflicts=True)
+
+
+def rebuild_subject_index(batch_size=5000, clear=False, progress=None):
+    if clear:
+        BookSubject.objects.all().delete()
+        SubjectWord.objects.all().delete()
+        Subject.objects.all().delete()
+
+    known = dict(Subject.objects.values_list('name', 'id'))
+    rows = Books.objects.exclude(subjects__isnull=True).exclude(subjects='').values_list('id', 'subjects')
+
+    total, batch = 0, []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += index_subjects(batch, known)
+            batch = []
+            if progress:
+                progress(total)
+    if batch:
+        total += index_subjects(batch, known)
+    return total
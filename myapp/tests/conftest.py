@@ -0,0 +1,18 @@
+import time
+import pytest
+from myapp.caching import cache_stats
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(settings, tmp_path, monkeypatch):
+    '''
+    The file cache is not rolled back with the test's transaction, every test
+    gets an empty one of its own instead of sharing the development cache.
+    The hit/miss counters only flush when a test asks for them, not in the
+    middle of a request whose queries are being counted.
+    '''
+    settings.CACHES = {
+        'default': {**settings.CACHES['default'], 'LOCATION': str(tmp_path / 'cache')},
+    }
+    monkeypatch.setattr(cache_stats, 'flush_interval', 3600)
+    monkeypatch.setattr(cache_stats, '_flushed_at', time.monotonic())
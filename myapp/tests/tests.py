@@ -1,14 +1,52 @@
 import collections
 collections.Callable = collections.abc.Callable
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
-from myapp.models import  Review, UserInfo, UserBookList, Books, NewTable, Author
+from myapp.models import  Review, UserInfo, UserBookList, Books, NewTable, Author, Subject, SubjectWord, BookSubject, BookRatingStats, BookLikeCount, UserActivity, UserBookListEntry, LeaderboardSnapshot, DeferredSchemaObject
 from rest_framework.authtoken.models import Token
 from django.test import TestCase
 from django.urls import reverse
 from unittest.mock import patch, MagicMock
 from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from array import array
+import gzip
+import importlib
+import json
+from io import StringIO
+import os
+import tempfile
+from myapp.autocomplete import (
+    LocalIndex, get_title_index, get_username_index, load_title_index, reset_title_index, reset_username_index
+)
+from myapp.prefix_index import InfixIndex, PrefixIndex
+from myapp.subjects import matching_subjects, split_subjects
+from myapp.sampler import EligibleIds, book_sampler
+from myapp.authors import AuthorNameCache, author_cache, resolve_author_names
+from myapp.booklists import add_book_to_list, list_book_ids, toggle_book
+import time
+import warnings
+from django.db import OperationalError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.utils import timezone
+from django.utils.http import http_date
+from datetime import timedelta
+from myapp.bookcache import work_scope
+from myapp.caching import CacheStats, cache_get, cache_stats
+from myapp.dumps import Checkpoint, import_authors, parse_author_lines
+from myapp.bulkload import deferrable_objects, sqlite_bulk_load
+from myapp.search import fts_index_available, rebuild_fts_index
+from myapp.fanout import run_concurrently
+from myapp.pagination import encode_cursor
+from myapp.views import MAX_RANDOM_BOOKS
+from myapp.leaderboards import (
+    highest_rated_data, leaderboard_snapshot, most_active_users_data, most_liked_data, refresh_leaderboards
+)
+import threading
 
 class UserTests(APITestCase):
     '''
@@ -138,7 +176,117 @@ class BookTests(APITestCase):
         self.assertEqual(data["pagination"]["current_page"], 1)
         self.assertEqual(data["pagination"]["per_page"], 10)
 
-            
+    def test_search_books_full_text(self):
+        '''
+        search uses the fts index, words can come in any order,
+        be lowercase and the last word can be a prefix
+        '''
+        Books.objects.create(key="fts_1", title="The Hobbit", author="Tolkien")
+        Books.objects.create(key="fts_2", title="Hobbit Tales and Other Hobbit Stories", author="Someone")
+        Books.objects.create(key="fts_3", title="Dune", author="Herbert")
+
+        response = self.client.get('/api/search/', {"q": "hob"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [book["title"] for book in response.data["results"]]
+        self.assertCountEqual(titles, ["The Hobbit", "Hobbit Tales and Other Hobbit Stories"])
+        self.assertEqual(response.data["pagination"]["total_books"], 2)
+
+        response = self.client.get('/api/search/', {"q": "book TEST"})
+        self.assertIn(self.book.id, [book["id"] for book in response.data["results"]])
+
+    def test_search_books_index_follows_updates(self):
+        '''
+        the triggers keep the index in sync when a title changes or a book is deleted
+        '''
+        self.book.title = "Renamed Volume"
+        self.book.save()
+
+        response = self.client.get('/api/search/', {"q": "renamed"})
+        self.assertEqual([book["id"] for book in response.data["results"]], [self.book.id])
+
+        self.book.delete()
+        response = self.client.get('/api/search/', {"q": "renamed"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_books_paginates_index_results(self):
+        '''
+        the fts results work with the paginator, including the out of range page clamp
+        '''
+        for i in range(5):
+            Books.objects.create(key=f"saga_{i}", title=f"Saga volume {i}", author="Author")
+
+        response = self.client.get('/api/search/', {"q": "saga", "page": 99, "per_page": 2})
+        data = response.json()
+        self.assertEqual(data["pagination"]["total_books"], 5)
+        self.assertEqual(data["pagination"]["total_pages"], 3)
+        self.assertEqual(data["pagination"]["current_page"], 3)
+        self.assertEqual(len(data["results"]), 1)
+
+    def test_search_books_cursor_pagination(self):
+        '''
+        walk forward through all pages with the next cursor, then back one page
+        '''
+        books = [
+            Books.objects.create(key=f"cur_{i}", title=f"Chronicle part {i}", author="Author")
+            for i in range(5)
+        ]
+
+        seen = []
+        params = {"q": "chronicle", "paginate": "cursor", "per_page": 2}
+        pages = []
+        while True:
+            data = self.client.get('/api/search/', params).json()
+            pages.append(data)
+            seen += [book["id"] for book in data["results"]]
+            self.assertEqual(data["pagination"]["total_books"], 5)
+            if not data["pagination"]["next"]:
+                break
+            params = {"q": "chronicle", "cursor": data["pagination"]["next"], "per_page": 2}
+
+        self.assertEqual(seen, [book.id for book in books])
+        self.assertEqual(len(pages), 3)
+        self.assertFalse(pages[0]["pagination"]["has_previous"])
+
+        data = self.client.get('/api/search/', {
+            "q": "chronicle", "cursor": pages[2]["pagination"]["prev"], "per_page": 2
+        }).json()
+        self.assertEqual([book["id"] for book in data["results"]], seen[2:4])
+        self.assertTrue(data["pagination"]["has_previous"])
+        self.assertTrue(data["pagination"]["has_next"])
+
+    def test_search_invalid_cursor(self):
+        response = self.client.get('/api/search/', {"q": "test", "cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for book_id in (2 ** 63, -1):
+            response = self.client.get('/api/search/', {"q": "test", "cursor": encode_cursor("next", book_id)})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_cursor_pagination(self):
+        '''
+        the subject filter supports the same cursor mode
+        '''
+        for i in range(3):
+            Books.objects.create(key=f'cf{i}', title=f'Mystery {i}', author='A', subjects='Mystery')
+
+        first = self.client.get(reverse('search_filter'), {
+            'filter': 'mystery', 'paginate': 'cursor', 'per_page': 2
+        }).json()
+        self.assertEqual(len(first['results']), 2)
+        self.assertEqual(first['pagination']['total_books'], 3)
+
+        second = self.client.get(reverse('search_filter'), {
+            'filter': 'mystery', 'cursor': first['pagination']['next'], 'per_page': 2
+        }).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['pagination']['next'])
+
+    def test_search_books_punctuation_only_query(self):
+        '''a query without any words falls back to the plain title lookup'''
+        response = self.client.get('/api/search/', {"q": "?!"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+
     def test_search_filter_returns_400_when_missing_param(self):
         '''
         test to see if the missing filter returns a 400
@@ -176,6 +324,44 @@ class BookTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code,status.HTTP_404_NOT_FOUND)
         
+    def test_get_books_batch(self):
+        '''
+        many books in request order with authors and rating stats, in a fixed number of queries
+        '''
+        author_cache.clear()
+        Author.objects.create(key="OLBATCHA", name="Batch Writer")
+        books = [Books.objects.create(key=f"batch{i}", title=f"Batch {i}", author="OLBATCHA") for i in range(3)]
+        Review.objects.create(book_id=books[1].id, rating=4, text="ok")
+        ids = [books[2].id, 999999, books[1].id, books[0].id]
+
+        NewTable.objects.create(works_key="batch1", isbn_10="1111111111")
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('books'), {'ids': ','.join(map(str, ids))})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([book['id'] for book in results], [books[2].id, books[1].id, books[0].id])
+        self.assertEqual(results[0]['author'], "Batch Writer")
+        self.assertEqual(results[1]['avg_rating'], 4.0)
+        self.assertEqual(results[1]['review_count'], 1)
+        self.assertEqual([book['isbn'] for book in results], [None, "1111111111", None])
+
+    def test_get_books_field_selection(self):
+        book = Books.objects.create(key="fields1", title="Fields", author="OLX", description="long text")
+
+        NewTable.objects.create(works_key="fields1", isbn_10="0123456789")
+        response = self.client.get(reverse('books'), {'ids': book.id, 'fields': 'id,title,isbn'})
+        self.assertEqual(response.data['results'], [{"id": book.id, "title": "Fields", "isbn": "0123456789"}])
+
+        response = self.client.get(reverse('books'), {'ids': book.id, 'fields': 'id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_books_rejects_ids_out_of_range(self):
+        response = self.client.get(reverse('books'), {'ids': f"1,{'9' * 30}"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"error": f"Invalid book id: {'9' * 30}"})
+
     def test_random_book_valid_num(self):
         '''
         Test random_book with valid num=1
@@ -238,6 +424,7 @@ class BookTests(APITestCase):
             cover=123,
             first_published=2000
         )
+        book_sampler.refresh()
 
         url = reverse('random_book')
         response = self.client.get(url, {'num': 1})
@@ -347,6 +534,23 @@ class BookTests(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, '1234567890')
 
+    def test_get_isbn_missing_work_is_404(self):
+        cache.clear()
+        response = self.client.get(reverse('isbn', kwargs={'work_key': 'OLNOISBNW'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_isbns_bulk(self):
+        NewTable.objects.create(works_key="OL1W", isbn_10="0000000001")
+        NewTable.objects.create(works_key="OL1W", isbn_10="0000000002")
+        NewTable.objects.create(works_key="OL2W", isbn_10="0000000003")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('isbns'), {'keys': 'OL2W,OL1W,OL3W'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"OL2W": "0000000003", "OL1W": "0000000001", "OL3W": None})
+        self.assertEqual(self.client.get(reverse('isbns')).status_code, status.HTTP_400_BAD_REQUEST)
+
         
         
 class ReviewTests(APITestCase):
@@ -502,10 +706,8 @@ class ReviewTests(APITestCase):
         '''
         url = reverse('highest-rated')
 
-        with patch('myapp.views.connection') as mock_connection:
-            mock_cursor = MagicMock()
-            mock_cursor.execute.side_effect = Exception("Simulated DB failure")
-            mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
+        with patch('myapp.leaderboards.top_rated') as mock_top_rated:
+            mock_top_rated.side_effect = Exception("Simulated DB failure")
 
             response = self.client.get(url, {'num': 5})
 
@@ -517,7 +719,10 @@ class ReviewTests(APITestCase):
         '''
         test if the most liked books function works
         '''
-        user_list = UserBookList.objects.create(name="Liked Books", book_ids=[1, 2, 1, 3])
+        for book_ids in ([1, 2, 3], [1]):
+            user_list = UserBookList.objects.create(name="Liked Books")
+            for book_id in book_ids:
+                add_book_to_list(user_list, book_id)
         
         author = Author.objects.create(key="auth1", name="Author Name")
         Books.objects.create(id=1, key="b1", title="Book 1", author="auth1")
@@ -535,7 +740,9 @@ class ReviewTests(APITestCase):
         '''
         test if the limit works
         '''
-        UserBookList.objects.create(name="Liked Books", book_ids=list(range(1, 30)))
+        user_list = UserBookList.objects.create(name="Liked Books")
+        for book_id in range(1, 30):
+            add_book_to_list(user_list, book_id)
         author = Author.objects.create(key="auth", name="A")
 
         for i in range(1, 31):
@@ -551,8 +758,8 @@ class ReviewTests(APITestCase):
         '''
         test if the error handling works
         '''
-        with patch('myapp.views.UserBookList.objects.filter') as mock_filter:
-            mock_filter.side_effect = Exception("forced error")
+        with patch('myapp.leaderboards.most_liked') as mock_most_liked:
+            mock_most_liked.side_effect = Exception("forced error")
             url = reverse('most-liked')
             response = self.client.get(url)
             self.assertEqual(response.status_code, 500)
@@ -631,11 +838,7 @@ class ReviewTests(APITestCase):
         '''
         url = reverse('most-active-users') 
 
-        with patch('myapp.views.connection') as mock_connection:
-            mock_cursor = MagicMock()
-            mock_cursor.execute.side_effect = Exception("Simulated SQL error")
-            mock_connection.cursor.return_value.__enter__.return_value = mock_cursor
-
+        with patch('myapp.leaderboards.most_active', side_effect=Exception("Simulated SQL error")):
             response = self.client.get(url, {'num': 5})
 
         assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -653,6 +856,7 @@ class UserProfileTests(APITestCase):
     '''
 
     def setUp(self):
+        reset_username_index()
         self.user = User.objects.create_user(username='profileuser', password='password123')
         User.objects.create_user(username='alice', password='testpass')
         User.objects.create_user(username='alexander', password='testpass')
@@ -976,6 +1180,7 @@ class RecommendedBookTests(APITestCase):
                 first_published=1999 + i,
                 cover=i + 1
             )
+        book_sampler.refresh()
 
         self.url = reverse('random_book_api')
 
@@ -1016,8 +1221,10 @@ class RecommendedBookTests(APITestCase):
         '''
         test that the recommendation ignores blocked genres
         '''
+        Books.objects.create(key="book_scifi", title="Test Book SF", author="Author", subjects="Science Fiction", cover=99)
+        book_sampler.refresh()
         UserBookList.objects.create(user_id=self.user, name="Blocked Books", book_ids=["Fiction"])
-        response = self.client.get(self.url + "?num=5")
+        response = self.client.get(self.url + "?num=10")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         if isinstance(response.data, list):
             for book in response.data:
@@ -1082,9 +1289,10 @@ class UserBookListTests(APITestCase):
         
         self.book_list = UserBookList.objects.create(
             user_id=self.user,
-            name=self.book_list_name,
-            book_ids=[self.valid_book.id, self.invalid_book_id]
+            name=self.book_list_name
         )
+        add_book_to_list(self.book_list, self.valid_book.id)
+        add_book_to_list(self.book_list, self.invalid_book_id)
         
     def test_add_book_wrong_list_name(self):
         url = reverse('add_book',kwargs={'book_id': self.book.id}) + "?name=poopoo"
@@ -1105,7 +1313,7 @@ class UserBookListTests(APITestCase):
         
         book_list = UserBookList.objects.filter(user_id=self.user, name="Saved Books").first()
         self.assertIsNotNone(book_list)
-        self.assertIn(self.book.id, book_list.book_ids)
+        self.assertIn(self.book.id, list_book_ids(book_list))
         saved_books_url = reverse('book_list') + "?name=Saved Books"
         response = self.client.get(saved_books_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1124,7 +1332,7 @@ class UserBookListTests(APITestCase):
         
         book_list = UserBookList.objects.filter(user_id=self.user, name="Liked Books").first()
         self.assertIsNotNone(book_list)
-        self.assertIn(self.book.id, book_list.book_ids)
+        self.assertIn(self.book.id, list_book_ids(book_list))
         liked_books_url = reverse('book_list') + "?name=Liked Books"
         response = self.client.get(liked_books_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1151,9 +1359,9 @@ class UserBookListTests(APITestCase):
 
         book_list = UserBookList.objects.filter(user_id=self.user, name=self.book_list_name).first()
         self.assertIsNotNone(book_list)
-        self.assertIn(self.book.id, book_list.book_ids)
+        self.assertIn(self.book.id, list_book_ids(book_list))
 
-        print("Book List after first add:", book_list.book_ids)
+        print("Book List after first add:", list(list_book_ids(book_list)))
 
         response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1161,10 +1369,52 @@ class UserBookListTests(APITestCase):
 
         book_list = UserBookList.objects.filter(user_id=self.user, name=self.book_list_name).first()
         self.assertIsNotNone(book_list)
-        self.assertNotIn(self.book.id, book_list.book_ids)
+        self.assertNotIn(self.book.id, list_book_ids(book_list))
 
-        print("Book List after second action:", book_list.book_ids)
+        print("Book List after second action:", list(list_book_ids(book_list)))
         
+    def test_toggle_book_keeps_one_entry_per_book(self):
+        '''
+        toggling adds and removes a single entry row, the list row itself is not rewritten
+        '''
+        self.assertTrue(toggle_book(self.book_list, self.book.id))
+        self.assertFalse(add_book_to_list(self.book_list, self.book.id))
+        self.assertEqual(UserBookListEntry.objects.filter(book_list=self.book_list, book_id=self.book.id).count(), 1)
+
+        self.assertFalse(toggle_book(self.book_list, self.book.id))
+        self.assertFalse(self.book_list.entries.filter(book_id=self.book.id).exists())
+        self.book_list.refresh_from_db()
+        self.assertEqual(self.book_list.book_ids, [])
+
+    def test_book_list_membership_in_one_query(self):
+        '''
+        a page of cards learns which books are saved or liked with one query after auth
+        '''
+        liked = UserBookList.objects.create(user_id=self.user, name="Liked Books")
+        add_book_to_list(liked, self.valid_book.id)
+        add_book_to_list(liked, self.book.id)
+        other = User.objects.create_user(username='membershipother', password='password123')
+        add_book_to_list(UserBookList.objects.create(user_id=other, name="Saved Books"), self.book.id)
+
+        url = reverse('book_list_membership')
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'ids': f"{self.valid_book.id},{self.book.id},5"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            self.valid_book.id: {"saved": True, "liked": True},
+            self.book.id: {"saved": False, "liked": True},
+            5: {"saved": False, "liked": False},
+        })
+
+    def test_book_list_membership_rejects_bad_ids(self):
+        url = reverse('book_list_membership')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'ids': '1,abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'ids': '1' + '0' * 30}).status_code, status.HTTP_400_BAD_REQUEST)
+        too_many = ','.join(str(i) for i in range(501))
+        self.assertEqual(self.client.get(url, {'ids': too_many}).status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_saved_books_with_invalid_book_ids(self):
         '''
         test to see if the invalid book id is filtered out
@@ -1183,6 +1433,42 @@ class UserBookListTests(APITestCase):
 
         print(response_data)
 
+    def test_get_saved_books_keeps_list_order_in_constant_queries(self):
+        '''
+        hydrating the list is one query however long it is, order is kept and deleted ids skipped
+        '''
+        books = [Books.objects.create(id=300 + i, key=f"order{i}", title=f"Ordered {i}") for i in range(30)]
+        ids = [book.id for book in reversed(books)]
+        self.book_list.entries.all().delete()
+        for book_id in ids[:3] + [self.invalid_book_id]:
+            add_book_to_list(self.book_list, book_id)
+        url = reverse('book_list') + "?name=Saved Books"
+
+        with CaptureQueriesContext(connection) as short_list:
+            response = self.client.get(url)
+        self.assertEqual([book['id'] for book in response.data], ids[:3])
+
+        self.book_list.entries.all().delete()
+        for book_id in ids:
+            add_book_to_list(self.book_list, book_id)
+        with CaptureQueriesContext(connection) as long_list:
+            response = self.client.get(url)
+        self.assertEqual([book['id'] for book in response.data], ids)
+        self.assertEqual(len(short_list), len(long_list))
+
+    def test_get_saved_books_paginated(self):
+        for i in range(5):
+            Books.objects.create(id=400 + i, key=f"page{i}", title=f"Paged {i}")
+        self.book_list.entries.all().delete()
+        for book_id in range(400, 405):
+            add_book_to_list(self.book_list, book_id)
+
+        response = self.client.get(reverse('book_list'), {'name': 'Saved Books', 'page': 2, 'per_page': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['id'] for book in response.data['results']], [402, 403])
+        self.assertEqual(response.data['pagination']['total_pages'], 3)
+        self.assertTrue(response.data['pagination']['has_next'])
+
     def test_view_other_users_liked_books(self):
         '''
         see if others liked books are visible
@@ -1224,6 +1510,1306 @@ class UserBookListTests(APITestCase):
             
 
           
+class AutocompleteTests(APITestCase):
+    '''
+    Tests for the in-memory title prefix index behind /api/autocomplete/
+    '''
+
+    def setUp(self):
+        reset_title_index()
+        self.user = User.objects.create_user(username='completer', password='password123')
+        self.hobbit = Books.objects.create(key="ac_1", title="The Hobbit", author="Tolkien")
+        self.hound = Books.objects.create(key="ac_2", title="The Hound of the Baskervilles", author="Doyle")
+        self.emile = Books.objects.create(key="ac_3", title="Émile, or On Education", author="Rousseau")
+
+    def tearDown(self):
+        reset_title_index()
+
+    def test_autocomplete_prefix_ranked_by_reviews(self):
+        '''
+        both titles match "the ho", the one with more reviews comes first
+        '''
+        for _ in range(2):
+            Review.objects.create(book_id=self.hound.id, user=self.user, rating=4, text="good")
+
+        response = self.client.get(reverse('autocomplete'), {'query': 'the ho'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['id'] for book in response.data], [self.hound.id, self.hobbit.id])
+
+    def test_autocomplete_ignores_case_and_accents(self):
+        response = self.client.get(reverse('autocomplete'), {'query': 'EMILE'})
+        self.assertEqual(response.data, [{'id': self.emile.id, 'title': "Émile, or On Education"}])
+
+    def test_autocomplete_index_updates_incrementally(self):
+        '''
+        once the index is loaded new books, renames and reviews are applied on commit
+        '''
+        get_title_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            new_book = Books.objects.create(key="ac_4", title="The Hobbit Companion", author="Someone")
+            Review.objects.create(book_id=new_book.id, user=self.user, rating=5, text="nice")
+            self.emile.title = "Emma"
+            self.emile.save()
+
+        response = self.client.get(reverse('autocomplete'), {'query': 'the hob'})
+        self.assertEqual([book['id'] for book in response.data], [new_book.id, self.hobbit.id])
+
+        response = self.client.get(reverse('autocomplete'), {'query': 'emile'})
+        self.assertEqual(response.data, [])
+
+    def test_prefix_index_memoizes_large_ranges(self):
+        '''
+        prefixes matching more than scan_limit entries are cached and invalidated on change
+        '''
+        index = PrefixIndex([(i, f"Book {i}", i % 7) for i in range(50)], scan_limit=10)
+        top = index.complete("book", 3)
+        self.assertEqual([score % 7 for score, _ in top], [6, 6, 6])
+        self.assertIn("book", index._top_cache)
+
+        index.bump(0, 100)
+        self.assertNotIn("book", index._top_cache)
+        self.assertEqual(index.complete("book", 1), [(0, "Book 0")])
+
+        index.remove(0)
+        self.assertNotIn(0, index)
+        self.assertEqual(len(index), 49)
+
+    def test_build_title_index_command(self):
+        '''
+        the prebuilt file is picked up by the loader
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'titles.pickle')
+            call_command('build_title_index', output=path, stdout=StringIO())
+
+            with self.settings(TITLE_INDEX_PATH=path):
+                index = load_title_index()
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.complete("the hobbit"), [(self.hobbit.id, "The Hobbit")])
+
+    def test_outdated_title_index_file_is_rebuilt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'titles.pickle')
+            call_command('build_title_index', output=path, stdout=StringIO())
+            Books.objects.create(key="ac_5", title="The Hobbit, Illustrated", author="Tolkien")
+
+            with self.settings(TITLE_INDEX_PATH=path):
+                index = load_title_index()
+
+        self.assertEqual(len(index), 4)
+
+    def test_books_added_by_other_workers_show_up_after_a_rebuild(self):
+        get_title_index()
+        # bulk_create sends no signals, like a book added by another process or an import
+        Books.objects.bulk_create([Books(key="ac_6", title="Hobbit Cookbook", author="x")])
+        response = self.client.get(reverse('autocomplete'), {'query': 'hobbit c'})
+        self.assertEqual(response.data, [])
+
+        with self.settings(TITLE_INDEX_REFRESH_SECONDS=0):
+            response = self.client.get(reverse('autocomplete'), {'query': 'hobbit c'})
+        self.assertEqual([book['title'] for book in response.data], ["Hobbit Cookbook"])
+
+
+class SubjectIndexTests(APITestCase):
+    '''
+    Tests for the normalized Subject/BookSubject tables behind the subject filter
+    '''
+
+    def test_split_subjects_formats(self):
+        self.assertEqual(split_subjects("Fiction, Fantasy;  Épic fantasy"), ["fiction", "fantasy", "epic fantasy"])
+        self.assertEqual(split_subjects("['Drama', 'drama', 'History']"), ["drama", "history"])
+        self.assertEqual(split_subjects(None), [])
+
+    def test_filter_matches_any_word_of_a_subject_once(self):
+        '''
+        "fantasy" matches "fantasy", "fantasy fiction" and "urban fantasy", each book is only listed once
+        '''
+        book = Books.objects.create(key="s1", title="Epic", author="A", subjects="Fantasy, Fantasy Fiction")
+        other = Books.objects.create(key="s2", title="Other", author="A", subjects="Drama, Urban Fantasy")
+        Books.objects.create(key="s3", title="Plain", author="A", subjects="Fantastical Drama")
+
+        response = self.client.get(reverse('search_filter'), {'filter': 'FANTASY'})
+        self.assertEqual([b['id'] for b in response.data['results']], [book.id, other.id])
+        self.assertEqual(response.data['pagination']['total_books'], 2)
+        self.assertCountEqual(
+            matching_subjects("urban fant", "drama").values_list('name', flat=True),
+            ["urban fantasy", "drama", "fantastical drama"],
+        )
+        self.assertFalse(matching_subjects("ban").exists())
+
+    def test_migration_indexes_the_existing_books(self):
+        from django.apps import apps
+        fill_subject_index = importlib.import_module('myapp.migrations.0025_fill_subject_index')
+        add_subject_words = importlib.import_module('myapp.migrations.0026_subjectword').add_subject_words
+        Books.objects.bulk_create([
+            Books(key=f"old{i}", title=f"Old {i}", author="A", subjects="History, Costume Drama") for i in range(3)
+        ])
+
+        fill_subject_index.index_book_subjects(apps, None)
+        fill_subject_index.index_book_subjects(apps, None)
+        add_subject_words(apps, None)
+
+        self.assertEqual(BookSubject.objects.count(), 6)
+        self.assertCountEqual(Subject.objects.values_list('name', flat=True), ["history", "costume drama"])
+        self.assertEqual(list(matching_subjects("drama").values_list('name', flat=True)), ["costume drama"])
+
+    def test_changing_subjects_updates_the_index(self):
+        book = Books.objects.create(key="s3", title="Shifting", author="A", subjects="Horror")
+        book.subjects = "Comedy"
+        book.save()
+
+        self.assertEqual(self.client.get(reverse('search_filter'), {'filter': 'horror'}).data['results'], [])
+        self.assertEqual(len(self.client.get(reverse('search_filter'), {'filter': 'comedy'}).data['results']), 1)
+
+    def test_build_subject_index_command(self):
+        '''
+        bulk inserted books skip the signals, the command indexes them
+        '''
+        Books.objects.bulk_create([
+            Books(key=f"bulk{i}", title=f"Bulk {i}", author="A", subjects="Economy, History")
+            for i in range(3)
+        ])
+        self.assertEqual(BookSubject.objects.count(), 0)
+
+        call_command('build_subject_index', batch_size=2, stdout=StringIO())
+        self.assertEqual(BookSubject.objects.count(), 6)
+        self.assertCountEqual(Subject.objects.values_list('name', flat=True), ["economy", "history"])
+
+        call_command('build_subject_index', stdout=StringIO())
+        self.assertEqual(BookSubject.objects.count(), 6)
+
+
+class RandomBookSamplerTests(APITestCase):
+    '''
+    Tests for the precomputed array of eligible ids behind random_book and recommended_book
+    '''
+
+    def setUp(self):
+        self.books = [
+            Books.objects.create(key=f"rs{i}", title=f"Sampled {i}", author="A", description="d", cover=i + 1)
+            for i in range(4)
+        ]
+        self.no_cover = Books.objects.create(key="rs_nc", title="No cover", author="A", description="d")
+        book_sampler.refresh()
+
+    def test_sampler_only_holds_eligible_books(self):
+        self.assertEqual(list(book_sampler._ids.get()), [book.id for book in self.books])
+
+    def test_random_book_is_one_query(self):
+        '''
+        with a loaded sampler a draw is a single id__in lookup, no aggregates or ORDER BY RANDOM()
+        '''
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('random_book'), {'num': 3})
+        self.assertEqual(len(response.data), 3)
+        self.assertTrue({book['id'] for book in response.data} <= {book.id for book in self.books})
+
+    def test_large_num_is_capped_and_does_not_reload(self):
+        '''
+        asking for more books than there are is still a single lookup
+        '''
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('random_book'), {'num': 1000000})
+        self.assertEqual(len(response.data), 4)
+
+        with patch('myapp.views.book_sampler.sample_books', return_value=[]) as sample_books:
+            self.client.get(reverse('random_book'), {'num': 1000000})
+        sample_books.assert_called_once_with(MAX_RANDOM_BOOKS)
+
+    def test_sampler_recovers_from_stale_ids(self):
+        '''
+        ids of books deleted behind the sampler's back trigger a reload instead of short results
+        '''
+        Books.objects.filter(id__in=[book.id for book in self.books[:3]]).update(cover=None)
+        book_sampler.add(987654)
+
+        books = book_sampler.sample_books(5)
+        self.assertEqual([book.id for book in books], [self.books[3].id])
+        self.assertEqual(len(book_sampler), 1)
+
+    def test_sampler_follows_book_changes_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            new_book = Books.objects.create(key="rs_new", title="New", author="A", description="d", cover=9)
+            self.books[0].delete()
+            self.no_cover.cover = 5
+            self.no_cover.save()
+
+        self.assertEqual(
+            list(book_sampler._ids.get()),
+            sorted([book.id for book in self.books[1:]] + [self.no_cover.id, new_book.id])
+        )
+
+    @patch('myapp.autocomplete.connection')
+    def test_stale_ids_reload_once_in_the_background(self, mock_connection):
+        '''
+        requests keep drawing from the old ids while a single reload runs
+        '''
+        mock_connection.in_atomic_block = False
+        building, release = threading.Event(), threading.Event()
+        builds = []
+
+        def build():
+            builds.append(threading.current_thread().name)
+            building.set()
+            release.wait(5)
+            return EligibleIds(array('I', [self.books[0].id]))
+
+        old = book_sampler._ids.loaded()
+        with patch.object(book_sampler._ids, '_build', build), self.settings(SAMPLER_REFRESH_SECONDS=0):
+            for _ in range(3):
+                self.assertEqual(len(book_sampler.sample_ids(10)), 4)
+            self.assertTrue(building.wait(5))
+            release.set()
+            for _ in range(100):
+                if book_sampler._ids.loaded() is not old:
+                    break
+                time.sleep(0.05)
+
+        self.assertEqual(list(book_sampler._ids.get()), [self.books[0].id])
+        self.assertEqual(builds, ['sampler-index-rebuild'])
+
+
+class AuthorResolverTests(APITestCase):
+    '''
+    Tests for the batched, cached author key -> name lookups
+    '''
+
+    def setUp(self):
+        author_cache.clear()
+        for i in range(10):
+            Author.objects.create(key=f"OL{i}A", name=f"Writer {i}")
+
+    def tearDown(self):
+        author_cache.clear()
+
+    def test_resolve_many_keys_in_one_query(self):
+        keys = [f"OL{i}A" for i in range(10)] + ["unknown_key"]
+        with self.assertNumQueries(1):
+            names = resolve_author_names(keys)
+        self.assertEqual(names["OL3A"], "Writer 3")
+        self.assertEqual(names["unknown_key"], "unknown_key")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_author_names(keys), names)
+
+    def test_cache_expires_and_evicts(self):
+        small_cache = AuthorNameCache(max_size=2, ttl=60)
+        small_cache.set("a", "A")
+        small_cache.set("b", "B")
+        small_cache.get("a")
+        small_cache.set("c", "C")
+        self.assertEqual(small_cache.get("a"), "A")
+        self.assertIsNot(small_cache.get("c"), None)
+        self.assertNotEqual(small_cache.get("b"), "B")
+
+        with patch('myapp.authors.time.monotonic', return_value=time.monotonic() + 120):
+            self.assertNotEqual(small_cache.get("a"), "A")
+
+    def test_most_liked_books_constant_queries(self):
+        '''
+        the list costs the same number of queries no matter how many books it has
+        '''
+        for i in range(10):
+            Books.objects.create(id=500 + i, key=f"al{i}", title=f"Liked {i}", author=f"OL{i}A")
+        liked = UserBookList.objects.create(name="Liked Books")
+        for book_id in range(500, 510):
+            add_book_to_list(liked, book_id)
+
+        with self.assertNumQueries(2):
+            books = most_liked_data(10)
+        self.assertEqual(len(books), 10)
+        self.assertEqual({book['author'] for book in books}, {f"Writer {i}" for i in range(10)})
+
+
+class RatingStatsTests(APITestCase):
+    '''
+    Tests for the BookRatingStats table kept up to date on every review
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rater', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.book = Books.objects.create(id=700, key="rated", title="Rated Book", author="a", cover=7)
+
+    def test_add_review_updates_stats(self):
+        url = reverse('add_review', kwargs={'book_id1': self.book.id})
+        self.client.post(url, {'text': 'ok', 'rating': 3})
+        self.client.post(url, {'text': 'great', 'rating': '4'})
+
+        stats = BookRatingStats.objects.get(book_id=self.book.id)
+        self.assertEqual((stats.review_count, stats.rating_sum), (2, 7))
+        self.assertAlmostEqual(stats.avg_rating, 3.5)
+
+        response = self.client.get(reverse('retrieve_book_info', kwargs={'book_id': self.book.id}))
+        self.assertEqual(response.data['avg_rating'], 3.5)
+        self.assertEqual(response.data['review_count'], 2)
+
+    def test_book_without_reviews_has_no_rating(self):
+        response = self.client.get(reverse('retrieve_book_info', kwargs={'book_id': self.book.id}))
+        self.assertIsNone(response.data['avg_rating'])
+        self.assertEqual(response.data['review_count'], 0)
+
+    def test_deleting_reviews_recounts(self):
+        reviews = [Review.objects.create(book_id=self.book.id, user=self.user, rating=r, text="t") for r in (1, 5)]
+        reviews[0].delete()
+        stats = BookRatingStats.objects.get(book_id=self.book.id)
+        self.assertEqual((stats.review_count, stats.avg_rating), (1, 5.0))
+
+        reviews[1].delete()
+        self.assertFalse(BookRatingStats.objects.filter(book_id=self.book.id).exists())
+
+    def test_highest_rated_is_one_indexed_query(self):
+        '''
+        the list is read from the stats table, only the author lookup is added
+        '''
+        for i in range(5):
+            book = Books.objects.create(id=710 + i, key=f"r{i}", title=f"R {i}", author="a", cover=1)
+            for _ in range(3):
+                Review.objects.create(book_id=book.id, user=self.user, rating=1 + i, text="t")
+        author_cache.clear()
+        self.client.credentials()
+
+        with self.assertNumQueries(2):
+            books = highest_rated_data(5)
+        self.assertEqual([book['id'] for book in books], [714, 713, 712, 711, 710])
+        response = self.client.get(reverse('highest-rated'), {'num': 5})
+        self.assertEqual(response.data, books)
+
+
+class LikeCountTests(APITestCase):
+    '''
+    Tests for the per-book like counters behind most_liked_books
+    '''
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='liker', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.book = Books.objects.create(id=800, key="liked", title="Liked Book", author="a")
+
+    def likes(self, book_id):
+        count = BookLikeCount.objects.filter(book_id=book_id).first()
+        return count.likes if count else 0
+
+    def test_toggling_a_like_updates_the_counter(self):
+        url = reverse('add_book', kwargs={'book_id': self.book.id}) + "?name=Liked Books"
+        self.client.post(url)
+        self.assertEqual(self.likes(self.book.id), 1)
+
+        other = User.objects.create_user(username='liker2', password='password123')
+        add_book_to_list(UserBookList.objects.create(user_id=other, name="Liked Books"), self.book.id)
+        self.assertEqual(self.likes(self.book.id), 2)
+
+        self.client.post(url)
+        self.assertEqual(self.likes(self.book.id), 1)
+
+        response = self.client.get(reverse('most-liked'))
+        self.assertEqual(response.data[0]['likes_count'], 1)
+
+    def test_saved_books_do_not_count_as_likes(self):
+        self.client.post(reverse('add_book', kwargs={'book_id': self.book.id}) + "?name=Saved Books")
+        self.assertEqual(self.likes(self.book.id), 0)
+
+    def test_deleting_a_user_removes_their_likes(self):
+        other = User.objects.create_user(username='leaver', password='password123')
+        add_book_to_list(UserBookList.objects.create(user_id=other, name="Liked Books"), self.book.id)
+        self.assertEqual(self.likes(self.book.id), 1)
+
+        other.delete()
+        self.assertEqual(self.likes(self.book.id), 0)
+
+
+class UserActivityTests(APITestCase):
+    '''
+    Tests for the per-user review counters behind most_active_users
+    '''
+
+    def setUp(self):
+        self.book = Books.objects.create(id=900, key="active", title="Active Book", author="a")
+        self.other_book = Books.objects.create(id=901, key="active2", title="Other Book", author="a")
+
+    def test_reviews_update_the_counter_and_latest_review(self):
+        user = User.objects.create_user(username='reviewer', password='password123')
+        Review.objects.create(user=user, book_id=self.book.id, rating=5, text="good")
+        latest = Review.objects.create(user=user, book_id=self.other_book.id, rating=2, text="meh")
+
+        activity = UserActivity.objects.get(user=user)
+        self.assertEqual(activity.review_count, 2)
+        self.assertEqual(activity.latest_review_id, latest.id)
+        self.assertEqual(activity.latest_book_id, self.other_book.id)
+
+        latest.delete()
+        activity.refresh_from_db()
+        self.assertEqual(activity.review_count, 1)
+        self.assertEqual(activity.latest_book_id, self.book.id)
+
+        Review.objects.filter(user=user).delete()
+        self.assertFalse(UserActivity.objects.filter(user=user).exists())
+
+    def test_most_active_users_is_one_query(self):
+        for i in range(5):
+            user = User.objects.create_user(username=f'active{i}', password='password123')
+            UserInfo.objects.create(user_id=user, bio=f"bio {i}")
+            for _ in range(i + 1):
+                Review.objects.create(user=user, book_id=self.book.id, rating=4, text="ok")
+
+        with self.assertNumQueries(1):
+            users = most_active_users_data(5)
+
+        self.assertEqual([user['username'] for user in users], [f'active{i}' for i in range(4, -1, -1)])
+        self.assertEqual(users[0]['bio'], "bio 4")
+        self.assertEqual(users[0]['latest_activity']['book_title'], "Active Book")
+
+        response = self.client.get(reverse('most-active-users'), {'num': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user['id'] for user in response.data], [user['id'] for user in users])
+
+
+class BookCacheTests(APITestCase):
+    '''
+    Tests for the versioned cache and ETags of the book page endpoints
+    '''
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cachereader', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.book = Books.objects.create(key="OLCACHEW", title="Cached Book", author="OLCACHEA")
+
+    def test_book_info_is_served_from_cache_until_a_review_is_added(self):
+        url = reverse('retrieve_book_info', kwargs={'book_id': self.book.id})
+        first = self.client.get(url)
+        self.assertEqual(first.data['review_count'], 0)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(cached['ETag'], first['ETag'])
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.client.post(reverse('add_review', kwargs={'book_id1': self.book.id}), {"text": "nice", "rating": 4})
+        self.client.credentials()
+
+        fresh = self.client.get(url)
+        self.assertEqual(fresh.data['review_count'], 1)
+        self.assertNotEqual(fresh['ETag'], first['ETag'])
+
+    def test_matching_etag_gets_304(self):
+        url = reverse('get_reviews', kwargs={'bid': self.book.id})
+        Review.objects.create(book_id=self.book.id, user=self.user, rating=5, text="great")
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Review.objects.create(book_id=self.book.id, rating=1, text="bad")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_renaming_a_user_refreshes_cached_reviews(self):
+        url = reverse('get_reviews', kwargs={'bid': self.book.id})
+        Review.objects.create(book_id=self.book.id, user=self.user, rating=5, text="great")
+        self.assertEqual(self.client.get(url).data[0]['username'], 'cachereader')
+
+        self.user.username = 'renamedreader'
+        self.user.save()
+        self.assertEqual(self.client.get(url).data[0]['username'], 'renamedreader')
+
+    def test_missing_book_is_not_cached(self):
+        url = reverse('retrieve_book_info', kwargs={'book_id': 424242})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        Books.objects.create(id=424242, key="OLLATEW", title="Late Book", author="a")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_odd_work_keys_make_valid_cache_keys(self):
+        work_key = "OL 1W\x01" + "x" * 300
+        NewTable.objects.create(works_key=work_key, isbn_10="3333333333")
+        url = reverse('isbn', kwargs={'work_key': work_key})
+
+        # the file cache warns about keys memcached would refuse
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.assertEqual(self.client.get(url).data, "3333333333")
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).data, "3333333333")
+        self.assertEqual(work_scope("OL45804W"), "workOL45804W")
+        self.assertNotEqual(work_scope("OL 1W"), work_scope("OL 2W"))
+
+
+class CacheStatsTests(APITestCase):
+    '''
+    Tests for the shared cache hit/miss counters
+    '''
+
+    def setUp(self):
+        cache.clear()
+        cache_stats.reset()
+
+    def test_hits_and_misses_are_counted_per_namespace(self):
+        cache_get('result_counts', 'missing')
+        cache.set('present', 1)
+        cache_get('result_counts', 'present')
+        cache_get('result_counts', 'present')
+
+        totals = cache_stats.totals()
+        self.assertEqual(totals['result_counts'], {"hits": 2, "misses": 1, "hit_rate": 0.667})
+        self.assertEqual(totals['book_pages']['hits'], 0)
+
+    def test_cache_stats_command(self):
+        cache_get('recommended', 'missing')
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn("recommended", out.getvalue())
+        self.assertIn("misses        1", out.getvalue())
+
+        call_command('cache_stats', '--reset', stdout=StringIO())
+        self.assertEqual(cache_stats.totals()['recommended']['misses'], 0)
+
+    def test_flushes_from_every_process_add_up(self):
+        '''
+        each worker has its own CacheStats, their flushes are added in the database
+        '''
+        workers = [CacheStats(flush_interval=3600) for _ in range(3)]
+        for worker in workers:
+            for _ in range(4):
+                worker.record('book_pages', True)
+            worker.record('book_pages', False)
+        for worker in workers:
+            worker.flush()
+
+        self.assertEqual(cache_stats.totals()['book_pages'], {"hits": 12, "misses": 3, "hit_rate": 0.8})
+
+    def test_due_flush_runs_off_the_request_and_keeps_counts_it_could_not_write(self):
+        book = Books.objects.create(key="OLSTATSW", title="Counted", author="a")
+        cache_stats._flushed_at = 0
+
+        writers = []
+
+        def locked(*args):
+            writers.append(threading.current_thread().name)
+            raise OperationalError("database is locked")
+
+        with patch('myapp.caching.add_to_counter', side_effect=locked):
+            response = self.client.get(reverse('retrieve_book_info', kwargs={'book_id': book.id}))
+            for thread in threading.enumerate():
+                if thread.name == 'cache-stats-flush':
+                    thread.join(5)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(writers, ['cache-stats-flush'])
+
+        self.assertEqual(cache_stats.totals()['book_pages'], {"hits": 0, "misses": 1, "hit_rate": 0.0})
+
+
+class DumpImportTests(APITestCase):
+    '''
+    Tests for the OpenLibrary dump import commands
+    '''
+
+    def write_dump(self, lines, compress=False):
+        fd, path = tempfile.mkstemp(suffix='.txt.gz' if compress else '.txt')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        data = ''.join(line + '\n' for line in lines).encode()
+        with (gzip.open(path, 'wb') if compress else open(path, 'wb')) as f:
+            f.write(data)
+        return path
+
+    def author_line(self, key, name):
+        record = json.dumps({"key": f"/authors/{key}", "name": name})
+        return f"/type/author\t/authors/{key}\t1\t2024-01-01T00:00:00\t{record}"
+
+    def test_import_gzip_dump_skips_existing_and_bad_lines(self):
+        Author.objects.create(key="OL1A", name="Already Here")
+        path = self.write_dump([
+            self.author_line("OL1A", "New Name"),
+            self.author_line("OL2A", "Second Author"),
+            "/type/author\t/authors/OL3A\t1\t2024\t{not json",
+            "/type/work\t/works/OL1W\t1\t2024\t{}",
+        ], compress=True)
+
+        out, err = StringIO(), StringIO()
+        call_command('import_authors', path, '--workers', '1', '--batch-size', '2', stdout=out, stderr=err)
+
+        self.assertEqual(dict(Author.objects.values_list('key', 'name')), {"OL1A": "Already Here", "OL2A": "Second Author"})
+        self.assertIn("Skipped 1 lines", err.getvalue())
+
+    def test_import_in_worker_processes_with_update(self):
+        Author.objects.create(key="OL1A", name="Old Name")
+        path = self.write_dump([self.author_line(f"OL{i}A", f"Author {i}") for i in range(1, 21)])
+
+        call_command('import_authors', path, '--workers', '2', '--batch-size', '3', '--update', stdout=StringIO())
+
+        self.assertEqual(Author.objects.count(), 20)
+        self.assertEqual(Author.objects.get(key="OL1A").name, "Author 1")
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('import_authors', '/nonexistent/authors.txt', stdout=StringIO())
+
+    def test_interrupted_import_resumes_from_the_checkpoint(self):
+        path = self.write_dump([self.author_line(f"OL{i}A", f"Author {i}") for i in range(1, 8)], compress=True)
+        checkpoint = Checkpoint(path + '.checkpoint', path)
+        self.addCleanup(checkpoint.clear)
+
+        class Interrupted(Exception):
+            pass
+
+        def stop_after_first_batch(total):
+            raise Interrupted()
+
+        with self.assertRaises(Interrupted):
+            import_authors(path, batch_size=3, checkpoint=checkpoint, progress=stop_after_first_batch)
+        self.assertEqual(Author.objects.count(), 3)
+        self.assertEqual(checkpoint.load()[1], 3)
+
+        with patch('myapp.dumps.parse_author_lines', wraps=parse_author_lines) as parse:
+            total, errors = import_authors(path, batch_size=3, checkpoint=checkpoint)
+
+        self.assertEqual(sum(len(call.args[0]) for call in parse.call_args_list), 4)
+        self.assertEqual(total, 7)
+        self.assertEqual(Author.objects.count(), 7)
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_checkpoint_of_another_dump_is_ignored(self):
+        path = self.write_dump([self.author_line("OL1A", "One")])
+        checkpoint = Checkpoint(path + '.checkpoint', path)
+        self.addCleanup(checkpoint.clear)
+        checkpoint.save(10, 1)
+        self.assertEqual(checkpoint.load(), (10, 1))
+
+        with open(path, 'ab') as f:
+            f.write(b"more\n")
+        self.assertEqual(Checkpoint(checkpoint.path, path).load(), (0, 0))
+
+    def test_bulk_load_defers_and_restores_indexes_and_triggers(self):
+        def schema():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE tbl_name IN ('myapp_books', 'myapp_booksubject')"
+                )
+                return set(cursor.fetchall())
+
+        before = schema()
+        path = self.write_dump([
+            self.record_line("work", f"/works/OL{i}W", {
+                "key": f"/works/OL{i}W", "title": f"Bulkloaded Saga {i}", "subjects": ["Epics"],
+            })
+            for i in range(5)
+        ])
+        with patch('myapp.bulkload.rebuild_fts_index', wraps=rebuild_fts_index) as rebuild:
+            call_command('import_works', path, '--workers', '1', '--bulk-load', stdout=StringIO())
+
+        self.assertEqual(schema(), before)
+        self.assertEqual(BookSubject.objects.filter(subject__name="epics").count(), 5)
+        if fts_index_available():
+            rebuild.assert_called_once()
+            response = self.client.get('/api/search/', {"q": "bulkloaded"})
+            self.assertEqual(len(response.data["results"]), 5)
+
+    def test_killed_bulk_load_is_repaired_by_the_next_import(self):
+        def schema():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name, sql FROM sqlite_master WHERE tbl_name = 'myapp_books'")
+                return set(cursor.fetchall())
+
+        before = schema()
+        # entered and not left, like a process killed in the middle of the load
+        killed = sqlite_bulk_load([Books])
+        killed.__enter__()
+        self.addCleanup(killed.__exit__, None, None, None)
+        self.assertLess(len(schema()), len(before))
+        self.assertTrue(DeferredSchemaObject.objects.exists())
+
+        Books.objects.create(key="/works/OL77W", title="Written While Dropped", author="a")
+        err = StringIO()
+        path = self.write_dump([self.author_line("OL1A", "One")])
+        call_command('import_authors', path, '--workers', '1', stdout=StringIO(), stderr=err)
+
+        self.assertIn("Restored", err.getvalue())
+        self.assertEqual(schema(), before)
+        self.assertFalse(DeferredSchemaObject.objects.exists())
+        if fts_index_available():
+            response = self.client.get('/api/search/', {"q": "dropped"})
+            self.assertEqual(len(response.data["results"]), 1)
+
+    def test_bulk_load_keeps_unique_and_looked_up_indexes(self):
+        with connection.cursor() as cursor:
+            names = {name for _, name, _, _ in deferrable_objects(
+                cursor, ['myapp_books', 'myapp_booksubject', 'new_table'],
+                keep={('myapp_booksubject', 'book_id'), ('new_table', 'works_key')},
+            )}
+        self.assertTrue(any(name.startswith('myapp_booksubject_subject_id') for name in names))
+        self.assertFalse(any(name.startswith('myapp_booksubject_book_id') for name in names))
+        self.assertNotIn('new_table_works_key_idx', names)
+        self.assertFalse(any(name.startswith('sqlite_autoindex') for name in names))
+
+    def record_line(self, record_type, key, record):
+        return f"/type/{record_type}\t{key}\t1\t2024-01-01T00:00:00\t{json.dumps(record)}"
+
+    def test_import_works_and_editions(self):
+        works = self.write_dump([
+            self.record_line("work", "/works/OL1W", {
+                "key": "/works/OL1W", "title": "Dune",
+                "description": {"type": "/type/text", "value": "Desert planet"},
+                "subjects": ["Science Fiction", "Deserts"],
+                "authors": [{"author": {"key": "/authors/OL9A"}, "type": {"key": "/type/author_role"}}],
+                "covers": [-1, 555],
+                "first_publish_date": "August 1965",
+            }),
+            self.record_line("work", "/works/OL2W", {"key": "/works/OL2W", "title": "No Cover Yet"}),
+            self.record_line("work", "/works/OL3W", {"key": "/works/OL3W"}),
+        ], compress=True)
+        editions = self.write_dump([
+            self.record_line("edition", "/books/OL1M", {
+                "key": "/books/OL1M", "works": [{"key": "/works/OL2W"}],
+                "isbn_10": ["0-441-17271-7"], "covers": [777], "publish_date": "1990",
+            }),
+            self.record_line("edition", "/books/OL2M", {
+                "key": "/books/OL2M", "works": [{"key": "/works/OL2W"}],
+                "isbn_10": ["0441172717", "1111111111"], "publish_date": "1984",
+            }),
+        ])
+
+        call_command('import_works', works, '--workers', '1', stdout=StringIO())
+        call_command('import_editions', editions, '--workers', '1', stdout=StringIO())
+
+        dune = Books.objects.get(key="OL1W")
+        self.assertEqual(
+            (dune.title, dune.description, dune.author, dune.cover, dune.first_published),
+            ("Dune", "Desert planet", "OL9A", 555, 1965),
+        )
+        self.assertEqual(
+            set(BookSubject.objects.filter(book=dune).values_list('subject__name', flat=True)),
+            {"science fiction", "deserts"},
+        )
+        later = Books.objects.get(key="OL2W")
+        self.assertEqual((later.cover, later.first_published), (777, 1984))
+        self.assertFalse(Books.objects.filter(key="OL3W").exists())
+        self.assertEqual(
+            sorted(NewTable.objects.values_list('works_key', 'isbn_10')),
+            [("OL2W", "0441172717"), ("OL2W", "1111111111")],
+        )
+
+    def test_rerunning_imports_updates_instead_of_duplicating(self):
+        def work(title, subjects):
+            return self.record_line("work", "/works/OL5W", {"key": "/works/OL5W", "title": title, "subjects": subjects})
+        edition = self.write_dump([self.record_line("edition", "/books/OL5M", {
+            "key": "/books/OL5M", "works": [{"key": "/works/OL5W"}], "isbn_10": ["2222222222"],
+        })])
+
+        call_command('import_works', self.write_dump([work("Old Title", ["Poetry"])]), '--workers', '1', stdout=StringIO())
+        call_command('import_editions', edition, '--workers', '1', stdout=StringIO())
+        call_command('import_works', self.write_dump([work("New Title", ["Drama"])]), '--workers', '1', stdout=StringIO())
+        call_command('import_editions', edition, '--workers', '1', stdout=StringIO())
+
+        book = Books.objects.get(key="OL5W")
+        self.assertEqual(book.title, "New Title")
+        self.assertEqual(list(BookSubject.objects.filter(book=book).values_list('subject__name', flat=True)), ["drama"])
+        self.assertEqual(NewTable.objects.filter(works_key="OL5W").count(), 1)
+
+    def test_reimported_work_keeps_cover_and_year_from_its_editions(self):
+        works = self.write_dump([self.record_line("work", "/works/OL6W", {"key": "/works/OL6W", "title": "Coverless"})])
+        editions = self.write_dump([self.record_line("edition", "/books/OL6M", {
+            "key": "/books/OL6M", "works": [{"key": "/works/OL6W"}], "covers": [888], "publish_date": "2001",
+        })])
+
+        call_command('import_works', works, '--workers', '1', stdout=StringIO())
+        call_command('import_editions', editions, '--workers', '1', stdout=StringIO())
+        call_command('import_works', works, '--workers', '1', '--restart', stdout=StringIO())
+
+        book = Books.objects.get(key="OL6W")
+        self.assertEqual((book.cover, book.first_published), (888, 2001))
+
+    def test_year_from_editions_is_the_earliest_over_all_batches(self):
+        works = self.write_dump([
+            self.record_line("work", "/works/OL10W", {"key": "/works/OL10W", "title": "Undated"}),
+            self.record_line("work", "/works/OL11W", {
+                "key": "/works/OL11W", "title": "Dated", "first_publish_date": "1965",
+            }),
+        ])
+        editions = self.write_dump([
+            self.record_line("edition", f"/books/OL1{i}M", {
+                "key": f"/books/OL1{i}M", "works": [{"key": f"/works/{work}"}], "publish_date": year,
+            })
+            for i, (work, year) in enumerate([
+                ("OL10W", "1990"), ("OL11W", "1950"), ("OL10W", "1984"), ("OL10W", "2001"),
+            ])
+        ])
+
+        call_command('import_works', works, '--workers', '1', stdout=StringIO())
+        call_command('import_editions', editions, '--workers', '1', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(
+            dict(Books.objects.values_list('key', 'first_published')), {"OL10W": 1984, "OL11W": 1965}
+        )
+
+    def test_records_of_unexpected_shape_are_counted_as_bad_lines(self):
+        works = self.write_dump([
+            "/type/work\t/works/OL7W\t1\t2024\t[]",
+            self.record_line("work", "/works/OL8W", {"key": "/works/OL8W", "title": "Odd Authors", "authors": ["OL1A"]}),
+            self.record_line("work", "/works/OL9W", {"key": "/works/OL9W", "title": "Fine"}),
+        ])
+        editions = self.write_dump([
+            "/type/edition\t/books/OL7M\t1\t2024\t\"just a string\"",
+            self.record_line("edition", "/books/OL8M", {"key": "/books/OL8M", "works": ["/works/OL9W"]}),
+        ])
+
+        err = StringIO()
+        call_command('import_works', works, '--workers', '1', stdout=StringIO(), stderr=err)
+        call_command('import_editions', editions, '--workers', '1', stdout=StringIO(), stderr=err)
+
+        self.assertEqual(list(Books.objects.values_list('key', flat=True)), ["OL9W"])
+        self.assertEqual(err.getvalue().count("Skipped 2 lines"), 2)
+
+    def test_importer_without_run_import_cannot_be_created(self):
+        from myapp.management.commands._dumps import DumpImportCommand
+
+        class Incomplete(DumpImportCommand):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class ReviewPageTests(APITestCase):
+    '''
+    Tests for the cursor pages of get_reviews
+    '''
+
+    def setUp(self):
+        cache.clear()
+        self.book = Books.objects.create(key="OLPAGEDW", title="Much Reviewed", author="a")
+        self.url = reverse('get_reviews', kwargs={'bid': self.book.id})
+        users = [User.objects.create_user(username=f'pagereader{i}', password='password123') for i in range(12)]
+        for i, user in enumerate(users):
+            Review.objects.create(book_id=self.book.id, user=user, rating=i % 5 + 1, text=f"review {i}")
+        # a few reviews written in the same instant, the id breaks the tie
+        same_time = timezone.now()
+        Review.objects.filter(text__in=["review 4", "review 5", "review 6"]).update(created_at=same_time)
+        self.newest_first = list(
+            Review.objects.filter(book_id=self.book.id).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def non_cache_queries(self, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        return response, [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+
+    def test_pages_walk_every_review_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            params = {"paginate": "cursor", "per_page": 5}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(review['id'] for review in response.data['results'])
+            cursor = response.data['pagination']['next']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual(response.data['pagination']['total_reviews'], 12)
+
+        back = self.client.get(self.url, {"cursor": response.data['pagination']['prev'], "per_page": 5})
+        self.assertEqual([review['id'] for review in back.data['results']], self.newest_first[5:10])
+
+    def test_every_page_costs_the_same_queries(self):
+        first, first_queries = self.non_cache_queries(self.url, {"paginate": "cursor", "per_page": 4})
+        cursor = self.client.get(self.url, {"cursor": first.data['pagination']['next'], "per_page": 4}).data['pagination']['next']
+        cache.clear()
+        last, last_queries = self.non_cache_queries(self.url, {"cursor": cursor, "per_page": 4})
+
+        self.assertEqual(last.data['results'][0]['username'], 'pagereader3')
+        # the reviews with their usernames, and the review count
+        self.assertEqual(len(first_queries), 2)
+        self.assertEqual(len(last_queries), 2)
+        self.assertNotIn('OFFSET', last_queries[0])
+
+    def test_later_pages_are_an_index_range(self):
+        cursor = self.client.get(self.url, {"paginate": "cursor", "per_page": 4}).data['pagination']['next']
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {"cursor": cursor, "per_page": 4})
+        page_query = next(query['sql'] for query in queries if 'myapp_review' in query['sql'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_query}')
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('review_book_created_idx (book_id=? AND created_at<?)', plan)
+
+    def test_page_size_is_capped(self):
+        for i in range(50):
+            Review.objects.create(book_id=self.book.id, rating=3, text=f"more {i}")
+        response = self.client.get(self.url, {"paginate": "cursor", "per_page": 1000})
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertEqual(response.data['pagination']['per_page'], 50)
+        self.assertTrue(response.data['pagination']['has_next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_book_without_reviews_gets_an_empty_page(self):
+        response = self.client.get(reverse('get_reviews', kwargs={'bid': 2904408}), {"paginate": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['pagination']['total_reviews'], 0)
+
+    def test_without_cursor_mode_reviews_come_back_newest_first(self):
+        response = self.client.get(self.url)
+        self.assertEqual([review['id'] for review in response.data], self.newest_first)
+
+    @patch('myapp.async_views.MAX_REVIEW_PAGE_SIZE', 5)
+    @patch('myapp.views.MAX_REVIEW_PAGE_SIZE', 5)
+    def test_without_cursor_mode_only_the_newest_come_back(self):
+        response = self.client.get(self.url)
+        self.assertEqual([review['id'] for review in response.data], self.newest_first[:5])
+        async_response = self.client.get(reverse('async_get_reviews', kwargs={'bid': self.book.id}))
+        self.assertEqual([review['id'] for review in async_response.json()], self.newest_first[:5])
+
+
+class UsernameAutocompleteTests(APITestCase):
+    '''
+    Tests for the in-memory username index behind /api/autocomplete-profile/
+    '''
+
+    def setUp(self):
+        reset_username_index()
+        self.book = Books.objects.create(key="OLUSERSW", title="Reviewed", author="a")
+        self.users = {
+            name: User.objects.create_user(username=name, password='password123')
+            for name in ["Annabel", "anna", "joanna", "hannah_reads", "bob"]
+        }
+        for name, reviews in [("joanna", 3), ("anna", 1), ("hannah_reads", 2)]:
+            for _ in range(reviews):
+                Review.objects.create(book_id=self.book.id, user=self.users[name], rating=4, text="ok")
+
+    def tearDown(self):
+        reset_username_index()
+
+    def suggest(self, query):
+        response = self.client.get(reverse('autocomplete_profile'), {'query': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [user['username'] for user in response.data]
+
+    def test_prefix_matches_first_then_infix_ranked_by_activity(self):
+        self.assertEqual(self.suggest('ANN'), ["anna", "Annabel", "joanna", "hannah_reads"])
+
+    def test_short_queries_only_match_prefixes(self):
+        self.assertEqual(self.suggest('b'), ["bob"])
+        self.assertEqual(self.suggest('o'), [])
+
+    def test_index_updates_incrementally(self):
+        '''
+        once the index is loaded new users, renames and reviews are applied on commit
+        '''
+        get_username_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = User.objects.create_user(username='annie', password='password123')
+            for _ in range(5):
+                Review.objects.create(book_id=self.book.id, user=newcomer, rating=5, text="great")
+            self.users["Annabel"].username = 'bel'
+            self.users["Annabel"].save()
+            self.users["joanna"].delete()
+
+        self.assertEqual(self.suggest('ann'), ["annie", "anna", "hannah_reads"])
+        self.assertEqual(self.suggest('bel'), ["bel"])
+
+    def test_infix_index_survives_save_and_load(self):
+        index = InfixIndex([(1, "Marianne", 0), (2, "annette", 4)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'users.pickle')
+            index.save(path)
+            loaded = InfixIndex.load(path)
+        self.assertEqual(loaded.complete("ann"), [(2, "annette"), (1, "Marianne")])
+        loaded.remove(1)
+        self.assertEqual(loaded.complete("rian"), [])
+
+    def test_users_added_by_other_workers_show_up_after_a_rebuild(self):
+        get_username_index()
+        # bulk_create sends no signals, like a signup handled by another process
+        User.objects.bulk_create([User(username='annika')])
+        self.assertNotIn('annika', self.suggest('annik'))
+
+        with self.settings(USERNAME_INDEX_REFRESH_SECONDS=0):
+            self.assertEqual(self.suggest('annik'), ['annika'])
+
+    def test_saving_without_a_rename_does_not_reindex(self):
+        index = get_username_index()
+        postings = sum(len(ids) for ids in index._trigrams.values())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users["joanna"].set_password('another-password')
+            self.users["joanna"].save()
+            self.users["bob"].email = 'bob@example.com'
+            self.users["bob"].save()
+        self.assertEqual(sum(len(ids) for ids in index._trigrams.values()), postings)
+        self.assertEqual(self.suggest('joan'), ["joanna"])
+
+    @patch('myapp.autocomplete.connection')
+    def test_rebuild_runs_in_the_background_and_keeps_changes_made_meanwhile(self, mock_connection):
+        mock_connection.in_atomic_block = False
+        building, release = threading.Event(), threading.Event()
+        builds = []
+
+        def build():
+            builds.append(threading.current_thread().name)
+            if len(builds) > 1:
+                building.set()
+                release.wait(5)
+            return InfixIndex([(1, "old name" if len(builds) == 1 else "rebuilt", 0)])
+
+        local = LocalIndex('test', build, 'TEST_INDEX_REFRESH_SECONDS', 0)
+        first = local.get()
+        with self.settings(TEST_INDEX_REFRESH_SECONDS=0):
+            self.assertIs(local.get(), first)
+        self.assertTrue(building.wait(5))
+        local.update(lambda index: index.add(2, "added meanwhile"))
+        self.assertEqual(first.complete("added"), [(2, "added meanwhile")])
+        release.set()
+
+        for _ in range(100):
+            if local.loaded() is not first:
+                break
+            time.sleep(0.05)
+        self.assertEqual(local.loaded().complete("re"), [(1, "rebuilt")])
+        self.assertEqual(local.loaded().complete("added"), [(2, "added meanwhile")])
+        self.assertEqual(builds[1], 'test-index-rebuild')
+
+
+class AsyncViewTests(APITestCase):
+    '''
+    Tests for the async versions of the read-heavy endpoints under /api/async/
+    '''
+
+    def setUp(self):
+        cache.clear()
+        reset_title_index()
+        self.user = User.objects.create_user(username='asyncreader', password='password123')
+        self.book = Books.objects.create(
+            key="OLASYNCW", title="Concurrent Reading", author="OLASYNCA", description="d", cover=7
+        )
+        Author.objects.create(key="OLASYNCA", name="Async Author")
+        Review.objects.create(book_id=self.book.id, user=self.user, rating=4, text="first")
+        Review.objects.create(book_id=self.book.id, rating=2, text="second")
+        book_sampler.refresh()
+
+    def tearDown(self):
+        reset_title_index()
+
+    def assertSameAsSync(self, sync_name, async_name, data=None, **kwargs):
+        sync_response = self.client.get(reverse(sync_name, kwargs=kwargs), data)
+        async_response = self.client.get(reverse(async_name, kwargs=kwargs), data)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return async_response
+
+    def test_async_views_answer_like_the_sync_ones(self):
+        self.assertSameAsSync('retrieve_book_info', 'async_retrieve_book_info', book_id=self.book.id)
+        self.assertSameAsSync('retrieve_book_info', 'async_retrieve_book_info', book_id=424242)
+        self.assertSameAsSync('get_reviews', 'async_get_reviews', bid=self.book.id)
+        self.assertSameAsSync('get_reviews', 'async_get_reviews', {"paginate": "cursor", "per_page": 1}, bid=self.book.id)
+        self.assertSameAsSync('get_reviews', 'async_get_reviews', {"cursor": "nonsense"}, bid=self.book.id)
+        self.assertSameAsSync('search_books', 'async_search_books', {"q": "concurrent"})
+        self.assertSameAsSync('search_books', 'async_search_books', {"q": "concurrent", "paginate": "cursor"})
+        self.assertSameAsSync('search_books', 'async_search_books', {})
+        self.assertSameAsSync('autocomplete', 'async_autocomplete', {"query": "concur"})
+
+    def test_book_without_reviews(self):
+        response = self.client.get(reverse('async_get_reviews', kwargs={'bid': 2904408}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_etags_are_shared_with_the_sync_views(self):
+        url = reverse('retrieve_book_info', kwargs={'book_id': self.book.id})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(
+            reverse('async_retrieve_book_info', kwargs={'book_id': self.book.id}), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    async def test_random_book_in_an_event_loop(self):
+        response = await self.async_client.get(reverse('async_random_book'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['id'], self.book.id)
+
+        response = await self.async_client.post(reverse('async_random_book'))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class HomePageTests(APITestCase):
+    '''
+    Tests for /api/home/, every homepage section in one request
+    '''
+
+    def setUp(self):
+        cache.clear()
+        author_cache.clear()
+        self.user = User.objects.create_user(username='homereader', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.book = Books.objects.create(key="OLHOMEW", title="Front Page", author="a", description="d", cover=3)
+        Review.objects.create(book_id=self.book.id, user=self.user, rating=5, text="loved it")
+        for rating in (3, 4):
+            Review.objects.create(book_id=self.book.id, rating=rating, text="anonymous")
+        add_book_to_list(UserBookList.objects.create(user_id=self.user, name="Liked Books"), self.book.id)
+        book_sampler.refresh()
+
+    def test_sections_match_the_single_endpoints(self):
+        response = self.client.get(reverse('homepage'), {"num": 2, "rated": 3, "liked": 3, "users": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['highest_rated'][0]['id'], self.book.id)
+        self.assertEqual(response.data['highest_rated'], self.client.get(reverse('highest-rated'), {"num": 3}).data)
+        self.assertEqual(response.data['most_liked'], self.client.get(reverse('most-liked'), {"num": 3}).data)
+        self.assertEqual(response.data['most_active_users'], self.client.get(reverse('most-active-users')).data)
+        self.assertEqual([book['id'] for book in response.data['recommended']], [self.book.id])
+
+    def test_leaderboards_come_from_snapshots_and_recommendations_are_per_user(self):
+        self.client.get(reverse('homepage'))
+        Review.objects.create(book_id=self.book.id, user=self.user, rating=1, text="second thoughts")
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        response = self.client.get(reverse('homepage'))
+        self.assertEqual(response.data['most_active_users'][0]['review_count'], 1)
+        self.assertEqual(response.data['recommended'][0]['id'], self.book.id)
+
+        refresh_leaderboards()
+        response = self.client.get(reverse('homepage'))
+        self.assertEqual(response.data['most_active_users'][0]['review_count'], 2)
+
+    def test_failing_section(self):
+        with patch('myapp.leaderboards.most_active', side_effect=Exception("DB exploded")):
+            response = self.client.get(reverse('homepage'))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @patch('myapp.fanout.connection')
+    def test_sections_run_on_the_thread_pool(self, mock_connection):
+        '''
+        outside a transaction every task gets a pool thread, each waits until all have started
+        '''
+        mock_connection.in_atomic_block = False
+        started = threading.Barrier(3, timeout=5)
+
+        def task():
+            started.wait()
+            return threading.current_thread().name
+
+        names = run_concurrently({"a": task, "b": task, "c": task})
+        self.assertEqual(set(names), {"a", "b", "c"})
+        self.assertEqual(len(set(names.values())), 3)
+        self.assertTrue(all(name.startswith('fanout') for name in names.values()))
+
+        with self.settings(HOME_SECTION_WORKERS=1):
+            self.assertEqual(run_concurrently({"a": lambda: threading.current_thread().name})["a"],
+                             threading.current_thread().name)
+
+
+class FanoutConnectionTests(APITransactionTestCase):
+    '''
+    Tests for run_concurrently outside a transaction, where the tasks really go to the pool
+    '''
+
+    def test_pool_threads_read_committed_rows_and_close_their_connections(self):
+        Books.objects.create(key="OLPOOLW", title="Pooled", author="a")
+        started = threading.Barrier(2, timeout=5)
+        closed = {}
+
+        def task():
+            started.wait()
+            name = threading.current_thread().name
+            # the in-memory test database ignores close(), so record the calls instead
+            db = connections['default']
+            closed[name] = db.close = MagicMock(wraps=db.close)
+            self.addCleanup(db.__dict__.pop, 'close', None)
+            return name, list(Books.objects.values_list('title', flat=True))
+
+        self.assertFalse(connection.in_atomic_block)
+        results = run_concurrently({"a": task, "b": task})
+
+        self.assertEqual([titles for _, titles in results.values()], [["Pooled"], ["Pooled"]])
+        self.assertEqual({name for name, _ in results.values()}, set(closed))
+        self.assertTrue(all(name.startswith('fanout') for name in closed))
+        for close in closed.values():
+            close.assert_called()
+
+
+class LeaderboardTests(APITestCase):
+    '''
+    Tests for the leaderboard snapshots and the refresh_leaderboards command
+    '''
+
+    def setUp(self):
+        author_cache.clear()
+        self.user = User.objects.create_user(username='ranker', password='password123')
+        self.book = Books.objects.create(id=950, key="ranked", title="Ranked Book", author="a", cover=9)
+        for rating in (3, 4, 5):
+            Review.objects.create(book_id=self.book.id, user=self.user, rating=rating, text="t")
+
+    def test_snapshot_is_served_until_refreshed(self):
+        refresh_leaderboards()
+        snapshot = LeaderboardSnapshot.objects.get(name='most_active_users')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('most-active-users'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['review_count'], 3)
+        self.assertEqual(response['Last-Modified'], http_date(snapshot.computed_at.timestamp()))
+
+        Review.objects.create(book_id=self.book.id, user=self.user, rating=1, text="t")
+        self.assertEqual(self.client.get(reverse('most-active-users')).data[0]['review_count'], 3)
+
+        call_command('refresh_leaderboards', stdout=StringIO())
+        self.assertEqual(self.client.get(reverse('most-active-users')).data[0]['review_count'], 4)
+
+    def test_missing_snapshot_is_computed_once_and_old_ones_are_served(self):
+        self.assertFalse(LeaderboardSnapshot.objects.exists())
+        response = self.client.get(reverse('highest-rated'), {'num': 5})
+        self.assertEqual([book['id'] for book in response.data], [self.book.id])
+        self.assertTrue(LeaderboardSnapshot.objects.filter(name='highest_rated').exists())
+
+        LeaderboardSnapshot.objects.filter(name='highest_rated').update(
+            entries=[], computed_at=timezone.now() - timedelta(days=1)
+        )
+        with patch('myapp.leaderboards.top_rated') as mock_top_rated:
+            self.assertEqual(leaderboard_snapshot('highest_rated').entries, [])
+        mock_top_rated.assert_not_called()
+
+    def test_only_one_request_computes_a_missing_snapshot(self):
+        cache.add('leaderboard_compute_most_liked', True)
+        self.addCleanup(cache.delete, 'leaderboard_compute_most_liked')
+        with patch('myapp.leaderboards.most_liked') as mock_most_liked:
+            response = self.client.get(reverse('most-liked'))
+        self.assertEqual(response.data, [])
+        mock_most_liked.assert_not_called()
+        self.assertFalse(LeaderboardSnapshot.objects.filter(name='most_liked').exists())
+
+        cache.delete('leaderboard_compute_most_liked')
+        self.client.get(reverse('most-liked'))
+        self.assertTrue(LeaderboardSnapshot.objects.filter(name='most_liked').exists())
+
+    def test_snapshot_is_sliced_per_request(self):
+        for i in range(3):
+            Books.objects.create(id=960 + i, key=f"lk{i}", title=f"Liked {i}", author="a")
+            add_book_to_list(UserBookList.objects.create(name="Liked Books"), 960 + i)
+        refresh_leaderboards()
+        self.assertEqual(len(self.client.get(reverse('most-liked'), {'num': 2}).data), 2)
+        self.assertEqual(len(self.client.get(reverse('most-liked')).data), 3)
+
+    def test_command_loop(self):
+        out = StringIO()
+        with patch('myapp.management.commands.refresh_leaderboards.time.sleep', side_effect=KeyboardInterrupt):
+            call_command('refresh_leaderboards', '--loop', '--interval', '60', stdout=out)
+        self.assertIn("Refreshed highest_rated, most_liked, most_active_users", out.getvalue())
+        self.assertIn("Stopped", out.getvalue())
+        self.assertEqual(LeaderboardSnapshot.objects.count(), 3)
+
+        with self.assertRaises(CommandError):
+            call_command('refresh_leaderboards', '--interval', '-1', stdout=StringIO())
+
+
 class GameTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='listuser', password='password123')
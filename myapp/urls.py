@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 from .views import login_user, signup_user, random_book, search_books, retrieve_book_info, add_review, get_reviews, autocomplete, search_filter, high_score
 
 
@@ -12,6 +12,7 @@ urlpatterns = [
     path('api/recommended-book/', views.recommended_book, name='random_book_api'),
     path('api/search/', search_books, name='search_books'),
     path('api/book/<int:book_id>/', retrieve_book_info, name='retrieve_book_info'),
+    path('api/books/', views.get_books, name='books'),
     path('api/reviewtest/<int:book_id1>/', add_review, name='add_review'),
     path('api/reviews/<int:bid>/', get_reviews, name='get_reviews'),
     path('api/autocomplete/', autocomplete, name='autocomplete'),
@@ -27,11 +28,20 @@ urlpatterns = [
     path('api/unblock-genre/', views.unblock_genre, name='unblock_genre'),
     path('api/blocked-genres/', views.get_blocked_genres, name='blocked_genres'),
     path('api/book-list/', views.get_saved_books, name='book_list'),
+    path('api/book-list/membership/', views.book_list_membership, name='book_list_membership'),
     path('api/isbn/<str:work_key>', views.getisbn, name='isbn'),
+    path('api/isbns/', views.get_isbns, name='isbns'),
     path('api/books_by_author/', views.get_books_by_author, name='books_by_author'),
     path('api/autocomplete-profile/', views.autocomplete_profile, name='autocomplete_profile'),
     path('api/high-score/', high_score, name='high_score'),
     path('highest-rated/', views.highest_rated_books, name='highest-rated'),
     path('most-liked/', views.most_liked_books, name='most-liked'),
     path('most-active-users/', views.most_active_users, name='most-active-users'),
+    path('api/home/', views.home, name='homepage'),
+
+    path('api/async/search/', async_views.search_books, name='async_search_books'),
+    path('api/async/autocomplete/', async_views.autocomplete, name='async_autocomplete'),
+    path('api/async/book/<int:book_id>/', async_views.retrieve_book_info, name='async_retrieve_book_info'),
+    path('api/async/reviews/<int:bid>/', async_views.get_reviews, name='async_get_reviews'),
+    path('api/async/random-book/', async_views.random_book, name='async_random_book'),
 ]
\ No newline at end of file
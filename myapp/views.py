@@ -4,18 +4,104 @@ from django.contrib.auth.hashers import check_password
 from rest_framework.response import Response
 from django.contrib.auth import authenticate, login, logout as django_logout
 from django.shortcuts import get_object_or_404
-from .models import Review, UserInfo, UserBookList, NewTable, Books, Author, User
-import random
-from django.db import connection
+from .models import Review, UserInfo, UserBookList, NewTable, Books, User, BookRatingStats
+from .search import TitleSearchResults, books_in_order, build_match_expression, fts_index_available
+from .pagination import (
+    MAX_ID, InvalidCursor, cached_count, cursor_paginate, decode_cursor, newest_first_fetcher, queryset_fetcher,
+    wants_cursor_pagination
+)
+from .autocomplete import get_title_index, get_username_index
+from .subjects import books_with_subjects, matching_subjects
+from .sampler import book_sampler, eligible_books
+from .authors import resolve_author_name, resolve_author_names
+from .leaderboards import compute_missing_leaderboard, leaderboard_snapshot, stored_leaderboard
+from .booklists import list_book_ids, list_membership, toggle_book
+from .bookdetails import book_details, isbns_for_works, parse_fields, rating_summary
+from .bookcache import book_scope, versioned_response, work_scope
+from .caching import cache_get, cache_set, cache_timeout
+from .fanout import run_concurrently
 from rest_framework.authtoken.models import Token
 import logging
 from django.core.paginator import Paginator
-from django.db.models import Min, Max
-from django.core.cache import cache
+from django.utils.http import http_date
 import time
 
 logger = logging.getLogger(__name__)
 
+MAX_CURSOR_PAGE_SIZE = 100
+MAX_REVIEW_PAGE_SIZE = 50
+MAX_LIST_PAGE_SIZE = 100
+MAX_BATCH_IDS = 500
+MAX_HOME_BOOKS = 50
+MAX_RANDOM_BOOKS = 50
+
+
+def book_search_result(book):
+    return {
+        "id": book.id,
+        "title": book.title,
+        "author": book.author,
+        "cover": book.cover,
+        "key": book.key
+    }
+
+
+def cursor_page_payload(request, fetch, count, count_namespace, count_value, per_page, **extra):
+    '''
+    (data, status) for the opt in cursor mode of the search views. Pages are keyed on
+    book id so every page costs the same, the total is cached between pages.
+    '''
+    per_page = min(max(1, per_page), MAX_CURSOR_PAGE_SIZE)
+    try:
+        books, next_cursor, prev_cursor = cursor_paginate(fetch, request.GET.get('cursor'), per_page)
+    except InvalidCursor:
+        return {"error": "Invalid cursor"}, 400
+
+    return {
+        "results": [book_search_result(book) for book in books],
+        **extra,
+        "pagination": {
+            "mode": "cursor",
+            "total_books": cached_count(count_namespace, count_value, count),
+            "per_page": per_page,
+            "next": next_cursor,
+            "prev": prev_cursor,
+            "has_next": next_cursor is not None,
+            "has_previous": prev_cursor is not None
+        }
+    }, 200
+
+
+def cursor_page_response(request, fetch, count, count_namespace, count_value, per_page, **extra):
+    data, status = cursor_page_payload(request, fetch, count, count_namespace, count_value, per_page, **extra)
+    return Response(data, status=status)
+
+def requested_values(request, name):
+    '''
+    Values from ?name=a,b,c (repeating name= works too), de-duplicated in order.
+    Raises ValueError with a message for the client when there are none or too many.
+    '''
+    values = []
+    for value in request.query_params.getlist(name):
+        values.extend(part.strip() for part in value.split(',') if part.strip())
+
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise ValueError(f"{name} parameter is required")
+    if len(values) > MAX_BATCH_IDS:
+        raise ValueError(f"At most {MAX_BATCH_IDS} {name} per request")
+    return values
+
+
+def requested_book_ids(request):
+    book_ids = requested_values(request, 'ids')
+    for book_id in book_ids:
+        # bigger ids cannot be books and overflow the database's integers
+        if not book_id.isdigit() or int(book_id) > MAX_ID:
+            raise ValueError(f"Invalid book id: {book_id}")
+    return list(dict.fromkeys(int(book_id) for book_id in book_ids))
+
+
 @api_view(['POST'])
 def login_user(request):
     username = request.data.get('username')
@@ -80,11 +166,11 @@ def autocomplete_profile(request):
     if not query:
         return Response([])
 
-    suggestions = User.objects.filter(username__icontains=query)[:5]
+    suggestions = get_username_index().complete(query, 5)
     
     formatted_suggestions = [
-        {'id': user.id, 'username': user.username} 
-        for user in suggestions
+        {'id': user_id, 'username': username} 
+        for user_id, username in suggestions
     ]
     
     print("suggestions", formatted_suggestions)
@@ -92,6 +178,12 @@ def autocomplete_profile(request):
 
 @api_view(['GET'])
 def search_books(request):
+    data, status = search_payload(request)
+    return Response(data, status=status)
+
+
+def search_payload(request):
+    '''(data, status) for a title search, shared with the async view'''
     start_time = time.time()
     print("getting request", request.GET)
     query = request.GET.get('q', '')
@@ -106,9 +198,17 @@ def search_books(request):
         per_page = 10
         
     if not query:
-        return Response({"error": "No query provided"}, status=400)
+        return {"error": "No query provided"}, 400
     
-    books = Books.objects.filter(title__icontains=query).order_by('id')
+    match_expression = build_match_expression(query)
+    if match_expression and fts_index_available():
+        books = TitleSearchResults(match_expression)
+    else:
+        books = Books.objects.filter(title__icontains=query).order_by('id')
+
+    if wants_cursor_pagination(request):
+        fetch = books.fetch if isinstance(books, TitleSearchResults) else queryset_fetcher(books)
+        return cursor_page_payload(request, fetch, books.count, 'search', query, per_page, query=query)
     
     paginator = Paginator(books, per_page)
     total_books = paginator.count
@@ -118,19 +218,10 @@ def search_books(request):
     
     current_page = paginator.get_page(page)
     
-    results = [
-        {
-            "id": book.id,
-            "title": book.title,
-            "author": book.author,
-            "cover": book.cover,
-            "key": book.key
-        } 
-        for book in current_page
-    ]
+    results = [book_search_result(book) for book in current_page]
     execution_time = time.time() - start_time
     print(f"SEARCH BOOKS: Query execution time: {execution_time:.4f} seconds, Results: {len(results)}")
-    return Response({
+    return {
         "results": results,
         "query": query,
         "pagination": {
@@ -141,67 +232,26 @@ def search_books(request):
             "has_next": current_page.has_next(),
             "has_previous": current_page.has_previous()
         }
-    })
+    }, 200
 
 
 @api_view(['GET'])
 def random_book(request):
+    num_books = random_book_count(request)
+    books_data = random_books_data(book_sampler.sample_books(num_books))
+    return Response(books_data[0] if num_books == 1 and books_data else books_data)
+
+
+def random_book_count(request):
+    '''num from the query string, capped at MAX_RANDOM_BOOKS'''
     try:
-        num_books = int(request.GET.get('num', 1))
+        return min(int(request.GET.get('num', 1)), MAX_RANDOM_BOOKS)
     except (TypeError, ValueError):
-        num_books = 1
-
-    min_id = Books.objects.filter(
-        description__isnull=False,
-        cover__isnull=False
-    ).aggregate(Min('id'))['id__min'] or 1
-    
-    max_id = Books.objects.filter(
-        description__isnull=False, 
-        cover__isnull=False
-    ).aggregate(Max('id'))['id__max'] or 1000
-    
-    sample_size = min(5 * num_books, max_id - min_id + 1)
-    random_ids = random.sample(range(min_id, max_id + 1), sample_size)
-    
-    books = Books.objects.filter(
-        id__in=random_ids, 
-        description__isnull=False,
-        cover__isnull=False,
-        cover__gt=0
-    )[:num_books]
-    
-    if len(books) < num_books:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, key, title, description, subjects, author, first_published, cover
-                FROM myapp_books
-                WHERE description IS NOT NULL 
-                AND cover IS NOT NULL
-                AND cover > 0
-                ORDER BY RANDOM()
-                LIMIT %s
-            """, [num_books])
-            
-            books_data = []
-            for row in cursor.fetchall():
-                books_data.append({
-                    "id": row[0],
-                    "key": row[1],
-                    "title": row[2],
-                    "description": row[3],
-                    "subjects": row[4],
-                    "author": row[5],
-                    "first_published": row[6],
-                    "cover": row[7]
-                })
-                
-            if not books_data:
-                return Response([], status=200)
-            
-            return Response(books_data[0] if num_books == 1 else books_data)
-    
-    books_data = [
+        return 1
+
+
+def random_books_data(books):
+    return [
         {
             "id": book.id,
             "key": book.key,
@@ -215,22 +265,22 @@ def random_book(request):
         for book in books
     ]
 
-    return Response(books_data[0] if num_books == 1 and books_data else books_data)
-
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def recommended_book(request):
     user = request.user
+    num_books = random_book_count(request)
     
-    try:
-        num_books = int(request.GET.get('num', 1))
-    except (TypeError, ValueError):
-        num_books = 1
-    
-    cache_key = f'recommended_books_{user.id}_{num_books}_{int(time.time() / 300)}'
-    cached_result = cache.get(cache_key)
+    result_books = recommended_books_data(user, num_books)
+    return Response(result_books[0] if num_books == 1 and result_books else result_books)
+
+
+def recommended_books_data(user, num_books):
+    '''random eligible books without the user's blocked genres, cached per user for a while'''
+    cache_key = f'recommended_books_{user.id}_{num_books}_{int(time.time() / cache_timeout("recommended"))}'
+    cached_result = cache_get('recommended', cache_key)
     if cached_result:
-        return Response(cached_result[0] if num_books == 1 and cached_result else cached_result)
+        return cached_result
     
     genre_list = UserBookList.objects.filter(user_id=user, name="Blocked Books").first()
     blocked_genres = []
@@ -239,27 +289,7 @@ def recommended_book(request):
         print("Blocked genres:", blocked_genres)
     
     if not blocked_genres:
-        min_id = Books.objects.filter(
-            description__isnull=False,
-            cover__isnull=False,
-            cover__gt=0
-        ).aggregate(Min('id'))['id__min'] or 1
-        
-        max_id = Books.objects.filter(
-            description__isnull=False,
-            cover__isnull=False,
-            cover__gt=0
-        ).aggregate(Max('id'))['id__max'] or 1000
-        
-        sample_size = min(5 * num_books, max_id - min_id + 1)
-        random_ids = random.sample(range(min_id, max_id + 1), sample_size)
-        
-        books = list(Books.objects.filter(
-            id__in=random_ids, 
-            description__isnull=False,
-            cover__isnull=False,
-            cover__gt=0
-        )[:num_books])
+        books = book_sampler.sample_books(num_books)
         
         result_books = [
             {
@@ -275,53 +305,17 @@ def recommended_book(request):
             for book in books
         ]
         
-        cache.set(cache_key, result_books, 300)
-        return Response(result_books[0] if num_books == 1 and result_books else result_books)
+        cache_set('recommended', cache_key, result_books)
+        return result_books
 
    
-    sample_size = min(2000, Books.objects.count()) 
-    
-    min_id = Books.objects.filter(
-        description__isnull=False,
-        cover__isnull=False,
-        cover__gt=0
-    ).aggregate(Min('id'))['id__min'] or 1
-    
-    max_id = Books.objects.filter(
-        description__isnull=False,
-        cover__isnull=False,
-        cover__gt=0
-    ).aggregate(Max('id'))['id__max'] or 1000
-    
-    candidate_ids = random.sample(range(min_id, max_id + 1), min(sample_size, max_id - min_id + 1))
-    
-    candidate_books = Books.objects.filter(
-        id__in=candidate_ids, 
-        description__isnull=False,
-        cover__isnull=False,
-        cover__gt=0
-    )
+    candidate_ids = book_sampler.sample_ids(2000)
     
-    filtered_books = []
-    for book in candidate_books:
-        if not book.subjects:
-            filtered_books.append(book)
-            if len(filtered_books) >= num_books:
-                break
-            
-        subjects = book.subjects.lower()
-        should_include = True
-        
-        for blocked_genre in blocked_genres:
-            if blocked_genre.lower() in subjects:
-                should_include = False
-                break
-                
-        if should_include:
-            filtered_books.append(book)
-            
-        if len(filtered_books) >= num_books:
-            break
+    filtered_books = list(eligible_books().filter(
+        id__in=candidate_ids
+    ).exclude(
+        id__in=books_with_subjects(matching_subjects(*blocked_genres))
+    )[:num_books])
     
     result_books = [
         {
@@ -337,37 +331,53 @@ def recommended_book(request):
         for book in filtered_books[:num_books]
     ]
     
-    cache.set(cache_key, result_books, 300)
-    
-    return Response(result_books[0] if num_books == 1 and result_books else result_books)
+    cache_set('recommended', cache_key, result_books)
+    return result_books
 
 @api_view(['GET'])
 def retrieve_book_info(request, book_id):
-    try:
-        book = Books.objects.get(id=book_id)
+    return versioned_response(request, book_scope(book_id), 'info', lambda: book_info_payload(book_id))
 
-        try:
-            author = Author.objects.get(key=book.author).name
-        except Author.DoesNotExist:
-            author = book.author
-        
-        book_data = {
-            "id": book.id,
-            "key": book.key,
-            "title": book.title,
-            "description": book.description,
-            "author": author,
-            "author_key": book.author,
-            "first_published": book.first_published,
-            "subjects": book.subjects,
-            "cover": book.cover
-            
-        }
-
-        return Response(book_data)
 
+def book_info_payload(book_id):
+    try:
+        book = Books.objects.select_related('rating_stats').get(id=book_id)
     except Books.DoesNotExist:
-        return Response({"error": "Book not found"}, status=404)
+        return {"error": "Book not found"}, 404
+
+    return book_info_data(book, resolve_author_name(book.author)), 200
+
+
+def book_info_data(book, author):
+    avg_rating, review_count = rating_summary(book)
+
+    return {
+        "id": book.id,
+        "key": book.key,
+        "title": book.title,
+        "description": book.description,
+        "author": author,
+        "author_key": book.author,
+        "first_published": book.first_published,
+        "subjects": book.subjects,
+        "cover": book.cover,
+        "avg_rating": avg_rating,
+        "review_count": review_count
+    }
+
+@api_view(['GET'])
+def get_books(request):
+    '''
+    Several books at once for pages that show many, e.g. /api/books/?ids=1,2,3&fields=id,title,author
+    Books come back in the order of ids, ids without a book are left out.
+    '''
+    try:
+        book_ids = requested_book_ids(request)
+        fields = parse_fields(request.query_params.get('fields'))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response({"results": book_details(book_ids, fields)})
 
 @api_view(['GET'])
 def get_books_by_author(request):
@@ -425,30 +435,94 @@ def add_review(request, book_id1):
 
 @api_view(['GET'])
 def get_reviews(request, bid):
+    '''
+    The newest MAX_REVIEW_PAGE_SIZE reviews of a book, 204 when there are none. With
+    ?paginate=cursor (or the cursor of a previous page) they come per_page at a time
+    and the older ones can be reached.
+    '''
     try:
-        reviews = Review.objects.filter(book_id=bid).order_by('-created_at')
+        if not wants_cursor_pagination(request):
+            return versioned_response(request, book_scope(bid), 'reviews', lambda: reviews_payload(bid))
 
-        if not reviews.exists():
-            return Response(status=204)
-
-        reviews_data = []
-        for review in reviews:
-            username = getattr(review.user, "username", "Anonymous") or "Anonymous"
-            reviews_data.append({
-                'id': review.id,
-                'rating': review.rating,
-                'text': review.text,
-                'username': username,
-                'creation_date': review.created_at
-            })
+        try:
+            per_page, token, position = review_page_params(request)
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor"}, status=400)
 
-        return Response(reviews_data)
+        return versioned_response(
+            request, book_scope(bid), f'reviews-{per_page}-{position}',
+            lambda: reviews_page_payload(bid, token, per_page)
+        )
 
     except Exception as e:
         print(f"Error getting reviews: {str(e)}")
         return Response({"error": str(e)}, status=500)
 
 
+def review_page_params(request):
+    '''(per_page, cursor token, page position for the cache key), raises InvalidCursor'''
+    try:
+        per_page = min(max(1, int(request.GET.get('per_page', 10))), MAX_REVIEW_PAGE_SIZE)
+    except ValueError:
+        per_page = 10
+    token = request.GET.get('cursor') or None
+    # the decoded cursor goes into the cache key, the raw token is client input
+    position = '-'.join(map(str, decode_cursor(token))) if token else 'first'
+    return per_page, token, position
+
+
+def book_reviews(bid):
+    '''only what a review card shows, the usernames come along in the same query'''
+    return (
+        Review.objects.filter(book_id=bid)
+        .select_related('user')
+        .only('id', 'rating', 'text', 'created_at', 'user__username')
+    )
+
+
+def review_data(review):
+    username = getattr(review.user, "username", "Anonymous") or "Anonymous"
+    return {
+        'id': review.id,
+        'rating': review.rating,
+        'text': review.text,
+        'username': username,
+        'creation_date': review.created_at
+    }
+
+
+def reviews_payload(bid):
+    newest = book_reviews(bid).order_by('-created_at', '-id')[:MAX_REVIEW_PAGE_SIZE]
+    reviews_data = [review_data(review) for review in newest]
+
+    if not reviews_data:
+        return None, 204
+
+    return reviews_data, 200
+
+
+def reviews_page_payload(bid, token, per_page):
+    '''
+    One page newest first, keyed on (created_at, id) so it is served from
+    review_book_created_idx and the hundredth page costs the same as the first.
+    '''
+    reviews, next_cursor, prev_cursor = cursor_paginate(newest_first_fetcher(book_reviews(bid)), token, per_page)
+    total = BookRatingStats.objects.filter(book_id=bid).values_list('review_count', flat=True).first()
+
+    return {
+        "results": [review_data(review) for review in reviews],
+        "pagination": {
+            "mode": "cursor",
+            "total_reviews": total or 0,
+            "per_page": per_page,
+            "next": next_cursor,
+            "prev": prev_cursor,
+            "has_next": next_cursor is not None,
+            "has_previous": prev_cursor is not None
+        }
+    }, 200
+
+
 @api_view(['GET'])
 def autocomplete(request):  
     query = request.GET.get('query', '')
@@ -457,11 +531,11 @@ def autocomplete(request):
     if not query:
         return Response([])
 
-    suggestions = Books.objects.filter(title__icontains=query)[:5]
+    suggestions = get_title_index().complete(query, 5)
     
     formatted_suggestions = [
-        {'id': book.id, 'title': book.title} 
-        for book in suggestions
+        {'id': book_id, 'title': title} 
+        for book_id, title in suggestions
     ]
     
     print("suggestions", formatted_suggestions)
@@ -485,7 +559,13 @@ def search_filter(request):
     print("subject filter", subject_filter)
 
     if subject_filter:
-        all_books = Books.objects.filter(subjects__icontains=subject_filter).order_by('id')
+        subjects = matching_subjects(subject_filter)
+        all_books = Books.objects.filter(id__in=books_with_subjects(subjects)).order_by('id')
+
+        if wants_cursor_pagination(request):
+            return cursor_page_response(
+                request, queryset_fetcher(all_books), all_books.count, 'filter', subject_filter, per_page
+            )
         
         paginator = Paginator(all_books, per_page)
         total_books = paginator.count
@@ -495,16 +575,7 @@ def search_filter(request):
         
         current_page = paginator.get_page(page)
         
-        results = [
-            {
-                "id": book.id,
-                "title": book.title,
-                "author": book.author,
-                "cover": book.cover,
-                "key": book.key
-            } 
-            for book in current_page
-        ]
+        results = [book_search_result(book) for book in current_page]
         execution_time = time.time() - start_time
         print(f"SEARCH FILTER: Query execution time: {execution_time:.4f} seconds, Results: {len(results)}")
         return Response({
@@ -533,9 +604,24 @@ def logout_user(request):
 @api_view(['GET'])
 def getisbn(request,work_key):
     '''get that isbn from newtable'''
-    isbn = NewTable.objects.filter(works_key=work_key).first()
-    
-    return Response(isbn.isbn_10)
+    def isbn_payload():
+        isbn = NewTable.objects.filter(works_key=work_key).first()
+        if isbn is None:
+            return {"error": "ISBN not found"}, 404
+        return isbn.isbn_10, 200
+
+    return versioned_response(request, work_scope(work_key), 'isbn', isbn_payload)
+
+@api_view(['GET'])
+def get_isbns(request):
+    '''isbn_10 for many works in one query, e.g. /api/isbns/?keys=OL1W,OL2W, None for works without one'''
+    try:
+        work_keys = requested_values(request, 'keys')
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    isbns = isbns_for_works(work_keys)
+    return Response({work_key: isbns.get(work_key) for work_key in work_keys})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -694,13 +780,9 @@ def make_list(user, list_name):
     return book_list
 
 def add_to_list(book_id, book_list):
-    if int(book_id) not in book_list.book_ids:
-        book_list.book_ids.append(int(book_id))
-        book_list.save()
+    if toggle_book(book_list, int(book_id)):
         return Response({"status": "success", "message": "Book saved successfully"}, status=200)
     else:
-        book_list.book_ids.remove(int(book_id))
-        book_list.save()
         return Response({"status": "removed", "message": "Book was removed"}, status=200)
 
     
@@ -744,33 +826,57 @@ def get_saved_books(request):
         user = request.user
 
     book_list = get_object_or_404(UserBookList, user_id=user, name=list_name)
-    
-    books_data = []
-    for book_id in book_list.book_ids:
+
+    book_ids = list_book_ids(book_list)
+    page = None
+    if 'page' in request.query_params:
         try:
-            book = Books.objects.get(id=book_id)
+            page_number = int(request.query_params.get('page'))
+            per_page = min(max(1, int(request.query_params.get('per_page', 50))), MAX_LIST_PAGE_SIZE)
+        except (TypeError, ValueError):
+            page_number, per_page = 1, 50
+        page = Paginator(book_ids, per_page).get_page(page_number)
+        book_ids = page.object_list
+
+    books = books_in_order(list(book_ids))
+    authors = resolve_author_names(book.author for book in books)
+    books_data = [
+        {
+            "id": book.id,
+            "key": book.key,
+            "title": book.title,
+            "author": authors[book.author], 
+            "cover": book.cover 
+        }
+        for book in books
+    ]
 
-            try:
-                author = Author.objects.get(key=book.author).name
-            except Author.DoesNotExist:
-                author = book.author
-        
+    if page is None:
+        return Response(books_data)
 
-            book_data = {
-                "id": book.id,
-                "key": book.key,
-                "title": book.title,
-                "author": author, 
-                "cover": book.cover 
-            }
+    return Response({
+        "results": books_data,
+        "pagination": {
+            "total_books": page.paginator.count,
+            "total_pages": page.paginator.num_pages,
+            "current_page": page.number,
+            "per_page": page.paginator.per_page,
+            "has_next": page.has_next(),
+            "has_previous": page.has_previous()
+        }
+    })
 
-            
-            books_data.append(book_data)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def book_list_membership(request):
+    '''which of the given books are in the user's saved and liked lists, for a page of book cards'''
+    try:
+        book_ids = requested_book_ids(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response(list_membership(request.user, book_ids))
 
-        except Books.DoesNotExist:
-            pass
-    
-    return Response(books_data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -854,41 +960,7 @@ def highest_rated_books(request):
         
         num_books = min(max(1, num_books), 20)
         
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT b.id, b.key, b.title, b.author, b.cover, 
-                       AVG(r.rating) as avg_rating, 
-                       COUNT(r.id) as review_count
-                FROM myapp_books b
-                INNER JOIN myapp_review r ON b.id = r.book_id
-                WHERE b.cover IS NOT NULL AND b.cover > 0
-                GROUP BY b.id
-                HAVING COUNT(r.id) >= 3  -- Minimum number of reviews
-                ORDER BY avg_rating DESC, review_count DESC
-                LIMIT %s
-            """, [num_books])
-
-
-            books_data = []
-            for row in cursor.fetchall():
-                try:
-                    author = Author.objects.get(key=row[3]).name
-                    print("author is ", author)
-                except Author.DoesNotExist:
-                    print("Author not found")
-                    author = row[3]
-                
-                books_data.append({
-                    "id": row[0],
-                    "key": row[1],
-                    "title": row[2],
-                    "author": author,
-                    "cover": row[4],
-                    "avg_rating": round(float(row[5]), 1),
-                    "review_count": row[6]
-                })
-        
-        return Response(books_data)
+        return leaderboard_response('highest_rated', num_books)
     
     except Exception as e:
         print(f"Error fetching highest rated books: {str(e)}")
@@ -898,40 +970,9 @@ def highest_rated_books(request):
 @api_view(['GET']) 
 def most_liked_books(request):
     try:
-        num_books = min(int(request.GET.get('num', 5)), 20) 
-        
-        liked_lists = UserBookList.objects.filter(name="Liked Books")
-        
-        book_counts = {}
-        for liked_list in liked_lists:
-            for book_id in liked_list.book_ids:
-                book_counts[book_id] = book_counts.get(book_id, 0) + 1
-        
-        sorted_book_ids = sorted(book_counts.keys(), key=lambda x: book_counts[x], reverse=True)[:num_books]
+        num_books = max(0, min(int(request.GET.get('num', 5)), 20))
         
-        books_data = []
-        for book_id in sorted_book_ids:
-            try:
-                book = Books.objects.get(id=book_id)
-                
-                author = book.author
-                author_obj = Author.objects.filter(key=book.author).first()
-                if author_obj:
-                    author = author_obj.name
-
-                
-                books_data.append({
-                    "id": book.id,
-                    "key": book.key,
-                    "title": book.title,
-                    "author": author,
-                    "cover": book.cover,
-                    "likes_count": book_counts[book_id]
-                })
-            except Books.DoesNotExist:
-                continue
-        
-        return Response(books_data)
+        return leaderboard_response('most_liked', num_books)
     
     except Exception as e:
         print(f"Error fetching most liked books: {str(e)}")
@@ -943,48 +984,55 @@ def most_active_users(request):
     try:
         num_users = min(int(request.GET.get('num', 5)), 20)
         
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT u.id, u.username, COUNT(r.id) as review_count
-                FROM auth_user u
-                INNER JOIN myapp_review r ON u.id = r.user_id
-                GROUP BY u.id, u.username
-                ORDER BY review_count DESC
-                LIMIT %s
-            """, [num_users])
-            
-            users_data = []
-            for row in cursor.fetchall():
-                user_id, username, review_count = row
-                
-                try:
-                    user_info = UserInfo.objects.get(user_id=user_id)
-                    bio = user_info.bio or "No bio available"
-                except UserInfo.DoesNotExist:
-                    bio = "No bio available"
-                
-                try:
-                    latest_review = Review.objects.filter(user_id=user_id).order_by('-created_at')[0]
-                    latest_book = Books.objects.get(id=latest_review.book_id)
-                    latest_activity = {
-                        "book_title": latest_book.title,
-                        "book_id": latest_book.id,
-                        "rating": latest_review.rating,
-                        "date": latest_review.created_at
-                    }
-                except (IndexError, Books.DoesNotExist):
-                    latest_activity = None
-                
-                users_data.append({
-                    "id": user_id,
-                    "username": username,
-                    "review_count": review_count,
-                    "bio": bio,
-                    "latest_activity": latest_activity
-                })
-        
-        return Response(users_data)
+        return leaderboard_response('most_active_users', num_users)
     
     except Exception as e:
         print(f"Error fetching most active users: {str(e)}")
         return Response({"error": "Failed to retrieve most active users"}, status=500)
+
+
+def leaderboard_response(name, limit):
+    '''the first limit entries of the latest snapshot, Last-Modified says when it was computed'''
+    snapshot = leaderboard_snapshot(name)
+    response = Response(snapshot.entries[:max(0, limit)])
+    response['Last-Modified'] = http_date(snapshot.computed_at.timestamp())
+    return response
+
+
+@api_view(['GET'])
+def home(request):
+    '''
+    Everything the homepage shows in one request: recommended books (random ones
+    for visitors), the highest rated and most liked books and the most active users,
+    e.g. /api/home/?num=12&rated=3&liked=3&users=5
+    The sections are built at the same time, the leaderboards come from their snapshots.
+    '''
+    def limit(name, maximum=20):
+        try:
+            return min(max(1, int(request.GET.get(name, 5))), maximum)
+        except ValueError:
+            return 5
+
+    num_books = limit('num', MAX_HOME_BOOKS)
+    limits = {"highest_rated": limit('rated'), "most_liked": limit('liked'), "most_active_users": limit('users')}
+    user = request.user
+
+    if user.is_authenticated:
+        tasks = {"recommended": lambda: recommended_books_data(user, num_books)}
+    else:
+        tasks = {"recommended": lambda: random_books_data(book_sampler.sample_books(num_books))}
+    for name in limits:
+        tasks[name] = lambda name=name: stored_leaderboard(name)
+
+    try:
+        sections = run_concurrently(tasks)
+        # the pool threads only read, a missing snapshot is computed and stored from here
+        snapshots = {name: sections[name] or compute_missing_leaderboard(name) for name in limits}
+    except Exception as e:
+        print(f"Error building the homepage: {str(e)}")
+        return Response({"error": "Failed to load the homepage"}, status=500)
+
+    return Response({
+        "recommended": sections["recommended"],
+        **{name: snapshots[name].entries[:count] for name, count in limits.items()}
+    })
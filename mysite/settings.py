@@ -152,6 +152,59 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'myapp', 'static')]
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Prebuilt autocomplete index, written by `python manage.py build_title_index`.
+# Without the file, or when it no longer has as many books as the table, the index
+# is built from the books table on first use.
+TITLE_INDEX_PATH = BASE_DIR / 'title_index.pickle'
+# How often each process rebuilds its title index from the books table, to pick up
+# books added or renamed by the other workers and by imports
+TITLE_INDEX_REFRESH_SECONDS = 3600
+
+# How often each process rebuilds its username autocomplete index, to pick up
+# signups and renames handled by the other workers
+USERNAME_INDEX_REFRESH_SECONDS = 300
+
+# How often the random book sampler reloads its array of eligible book ids
+SAMPLER_REFRESH_SECONDS = 3600
+
+# Per-process LRU cache of author names used by the book list endpoints
+AUTHOR_CACHE_SIZE = 10000
+AUTHOR_CACHE_TTL = 3600
+
+# Cache shared by every worker process. By default it is a directory of files, so
+# a hit costs no query and cache writes never wait on the database's write lock.
+# Set CACHE_BACKEND and CACHE_LOCATION to point it at e.g. redis or memcached instead
+# when the workers run on more than one machine.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+# Seconds each kind of cached result is kept.
+# book_pages entries are dropped as soon as the book or its reviews change,
+# for those the timeout only bounds how much is kept.
+CACHE_TIMEOUTS = {
+    'recommended': 300,
+    'result_counts': 300,
+    'book_pages': 3600,
+}
+
+# How often each process adds its cache hit/miss counts to the shared totals,
+# from a background thread so cache reads never wait on the database either
+CACHE_STATS_FLUSH_SECONDS = 10
+
+# Threads /api/home/ uses to build its sections at the same time, 1 builds them one after another
+HOME_SECTION_WORKERS = 4
+
+# How often `python manage.py refresh_leaderboards --loop` recomputes the homepage leaderboards
+LEADERBOARD_REFRESH_SECONDS = 300
+
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
 